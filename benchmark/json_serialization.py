@@ -0,0 +1,66 @@
+"""Time to serialize a page of films to a JSON response body, old path
+(to_json() and the stdlib encoder) against the compiled serializer and the
+configured JSON provider.
+
+    python -m benchmark.json_serialization [--films 10000] [--repeat 20]
+
+Needs no database: the films are built in memory.
+"""
+import argparse
+from datetime import date, timedelta
+from time import perf_counter
+
+from flask.json.provider import DefaultJSONProvider
+
+from src.app import app
+from src.model import Film, State
+from src.model.film import serialize_film
+
+
+def make_films(count):
+    start = date(2000, 1, 1)
+    return [Film(id=index, name='Film {}'.format(index), duration=80 + index % 100,
+                 state=State.Done if index % 3 else State.InProduction,
+                 created_at=start + timedelta(days=index % 5000))
+            for index in range(1, count + 1)]
+
+
+def best_of(repeat, function):
+    timings = []
+    for _ in range(repeat):
+        started = perf_counter()
+        function()
+        timings.append(perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--films', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    films = make_films(args.films)
+    stdlib = DefaultJSONProvider(app)
+
+    with app.app_context():
+        def old():
+            return stdlib.response({'films': [film.to_json() for film in films]}).get_data()
+
+        def new():
+            return app.json.response({'films': [serialize_film(film) for film in films]}).get_data()
+
+        if old() != new():
+            raise SystemExit('Serialized output differs from to_json().')
+
+        old_seconds = best_of(args.repeat, old)
+        new_seconds = best_of(args.repeat, new)
+
+    print('{} films, provider {}'.format(args.films, type(app.json).__name__))
+    print('  to_json + stdlib     {:8.2f} ms'.format(old_seconds * 1000))
+    print('  serializer + {:<8} {:8.2f} ms'.format(app.config['JSON_BACKEND'], new_seconds * 1000))
+    print('  speedup              {:8.2f}x'.format(old_seconds / new_seconds))
+
+
+if __name__ == '__main__':
+    main()
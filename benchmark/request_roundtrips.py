@@ -0,0 +1,90 @@
+"""Counts database round trips per request, with and without the old
+per-request ``create_all()`` hook.
+
+    python -m benchmark.request_roundtrips [--requests 200]
+
+Runs against an in-memory SQLite database unless SQLALCHEMY_DATABASE_URI
+is already set in the environment.
+"""
+import argparse
+import os
+from base64 import b64encode
+from datetime import date
+
+os.environ.setdefault('SQLALCHEMY_DATABASE_URI', 'sqlite://')
+
+from sqlalchemy import event
+
+from src.app import app, db
+from src.model import User, Role, Film, State
+import src.route
+
+
+class RoundTripCounter:
+
+    def __init__(self):
+        self.statements = 0
+        self.commits = 0
+
+    def on_execute(self, *args):
+        self.statements += 1
+
+    def on_commit(self, *args):
+        self.commits += 1
+
+    def reset(self):
+        self.statements = 0
+        self.commits = 0
+
+
+def legacy_create_tables():
+    db.create_all()
+    db.session.commit()
+
+
+def seed():
+    with app.app_context():
+        db.create_all()
+        role = Role(name='user')
+        user = User(username='bench', email='bench@example.com', password=User.generate_hash('benchmark'))
+        user.roles.append(role)
+        db.session.add(user)
+        db.session.add(Film(name='Bench', duration=100, state=State.Done, created_at=date(2022, 12, 1)))
+        db.session.commit()
+
+
+def measure(client, counter, requests):
+    headers = {'Authorization': 'Basic ' + b64encode(b'bench:benchmark').decode()}
+    counter.reset()
+    for _ in range(requests):
+        response = client.get('/film/1', headers=headers)
+        assert response.status_code == 200, response.status_code
+    return counter.statements / requests, counter.commits / requests
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    seed()
+    counter = RoundTripCounter()
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', counter.on_execute)
+        event.listen(db.engine, 'commit', counter.on_commit)
+
+    client = app.test_client()
+
+    app.before_request_funcs.setdefault(None, []).insert(0, legacy_create_tables)
+    before = measure(client, counter, args.requests)
+    app.before_request_funcs[None].remove(legacy_create_tables)
+    after = measure(client, counter, args.requests)
+
+    print('GET /film/<filmId>, {} requests'.format(args.requests))
+    print('{:<28}{:>12}{:>10}'.format('', 'statements', 'commits'))
+    print('{:<28}{:>12.1f}{:>10.1f}'.format('before (create_all hook)', *before))
+    print('{:<28}{:>12.1f}{:>10.1f}'.format('after (startup bootstrap)', *after))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,316 @@
+"""Throughput, latency percentiles and queries per request of every route in
+src/route/films.py and src/route/users.py, driven through the Flask test
+client against a database seeded with 1k, 100k and 1M films.
+
+    python -m benchmark.routes [--scales 1000,100000,1000000] [--requests 200]
+                               [--output results.json] [--baseline baseline.json]
+                               [--threshold 0.25] [--routes films]
+
+Results are written as JSON. With --baseline, a route regresses when its p50
+or p95 latency grows by more than --threshold (a fraction), its throughput
+falls by more than --threshold, or it runs more queries per request; any
+regression exits with status 1. Save a known-good run with --output and pass
+it back as --baseline.
+
+Each scale starts from an empty schema, so the database must be disposable:
+a temporary SQLite file is used unless DB_PROFILE or SQLALCHEMY_DATABASE_URI
+is set, and any other database but an in-memory one needs --force, SQLite
+files included.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+from base64 import b64encode
+from datetime import date, datetime, timedelta
+from time import perf_counter
+from typing import Callable, NamedTuple
+
+if 'DB_PROFILE' not in os.environ and 'SQLALCHEMY_DATABASE_URI' not in os.environ:
+    _, DATABASE = tempfile.mkstemp(suffix='.db')
+    os.environ['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + DATABASE
+else:
+    DATABASE = None
+
+from sqlalchemy import event
+
+from src.app import app, db
+from src.model import User, Role, Film, State, issue_token
+from src.model.film import film_cache
+from src.model.user import UsersRoles, Principal, credential_cache, role_registry
+import src.route
+
+PASSWORD = 'benchmark'
+SEED_BATCH_SIZE = 10000
+# password hashing routes are slow by design, they run fewer requests
+HASHING_REQUESTS = 20
+
+
+class QueryCounter:
+
+    def __init__(self):
+        self.statements = 0
+
+    def on_execute(self, *args):
+        self.statements += 1
+
+
+class Context(NamedTuple):
+    films: int
+    users: int
+    token: str
+
+
+class Scenario(NamedTuple):
+    name: str
+    method: str
+    # (i, context) -> (url, extra test client arguments)
+    request: Callable
+    hashing: bool = False
+    warmup: bool = True
+
+
+def film_row(i):
+    return {'name': 'film-{:07d}'.format(i),
+            'duration': 60 + i % 120,
+            'state': State.Done if i % 4 else State.InProduction,
+            'created_at': date(2000, 1, 1) + timedelta(days=i % 8000)}
+
+
+def spread(i, count, offset=1):
+    """Walks 1..count in a scattered order, so reads do not only hit the
+    cache or the first pages."""
+    return offset + (i * 7919) % count
+
+
+SCENARIOS = (
+    Scenario('GET /film/<filmId>', 'GET',
+             lambda i, ctx: ('/film/{}'.format(spread(i, ctx.films)), {})),
+    Scenario('GET /films', 'GET',
+             lambda i, ctx: ('/films?limit=50&after={}'.format(spread(i, ctx.films) - 1), {})),
+    Scenario('GET /films?state', 'GET',
+             lambda i, ctx: ('/films?limit=50&state=InProduction&after={}'.format(spread(i, ctx.films) - 1), {})),
+    Scenario('PUT /film/<filmId>', 'PUT',
+             lambda i, ctx: ('/film/{}'.format(spread(i, ctx.films)),
+                             {'json': {'name': 'put-{}'.format(i), 'duration': '1h 40m',
+                                       'created_at': '2022-12-01'}}), warmup=False),
+    Scenario('POST /film/<userId>', 'POST',
+             lambda i, ctx: ('/film/1', {'json': {'name': 'new-{}'.format(i), 'duration': '100',
+                                                  'created_at': '2022-12-01'}}), warmup=False),
+    Scenario('POST /films/bulk', 'POST',
+             lambda i, ctx: ('/films/bulk', {'json': [
+                 {'name': 'bulk-{}-{}'.format(i, row), 'duration': '100', 'created_at': '2022-12-01'}
+                 for row in range(100)]}), warmup=False),
+    Scenario('DELETE /film/<filmId>', 'DELETE',
+             lambda i, ctx: ('/film/{}'.format(ctx.films - i), {}), warmup=False),
+    Scenario('POST /user/login', 'POST',
+             lambda i, ctx: ('/user/login', {'headers': basic_auth_header('user2')})),
+    Scenario('GET /user/<userId>', 'GET',
+             lambda i, ctx: ('/user/{}'.format(spread(i, ctx.users)), {})),
+    Scenario('GET /user/name/<username>', 'GET',
+             lambda i, ctx: ('/user/name/user{}'.format(spread(i, ctx.users)), {})),
+    Scenario('GET /users', 'GET',
+             lambda i, ctx: ('/users?limit=50&after={}'.format(spread(i, ctx.users) - 1), {})),
+    Scenario('PUT /user/<userId>', 'PUT',
+             lambda i, ctx: ('/user/{}'.format(spread(i, ctx.users - 1, offset=2)),
+                             {'json': {'username': 'renamed-{}'.format(i),
+                                       'email': 'renamed-{}@example.com'.format(i)}}), warmup=False),
+    Scenario('POST /user/create', 'POST',
+             lambda i, ctx: ('/user/create', {'json': {'username': 'created-{}'.format(i),
+                                                       'email': 'created-{}@example.com'.format(i),
+                                                       'password': PASSWORD}}), hashing=True, warmup=False),
+    Scenario('POST /users/bulk', 'POST',
+             lambda i, ctx: ('/users/bulk', {'json': [
+                 {'username': 'bulk-{}-{}'.format(i, row), 'email': 'bulk-{}-{}@example.com'.format(i, row),
+                  'password': PASSWORD} for row in range(10)]}), hashing=True, warmup=False),
+    Scenario('DELETE /user/<userId>', 'DELETE',
+             lambda i, ctx: ('/user/{}'.format(ctx.users - i), {}), warmup=False),
+)
+
+
+def basic_auth_header(username):
+    credentials = '{}:{}'.format(username, PASSWORD).encode()
+    return {'Authorization': 'Basic ' + b64encode(credentials).decode()}
+
+
+def seed(films, users):
+    """Empty schema with films films and users users; user1 is the admin.
+    Every user shares one password hash, hashing is not what is measured."""
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.add_all([Role(id=1, name='user'), Role(id=2, name='admin')])
+        db.session.flush()
+        password = User.generate_hash(PASSWORD)
+
+        for start in range(1, films + 1, SEED_BATCH_SIZE):
+            ids = range(start, min(start + SEED_BATCH_SIZE, films + 1))
+            db.session.execute(Film.__table__.insert(), [dict(film_row(i), id=i) for i in ids])
+
+        for start in range(1, users + 1, SEED_BATCH_SIZE):
+            ids = range(start, min(start + SEED_BATCH_SIZE, users + 1))
+            db.session.execute(User.__table__.insert(), [
+                {'id': i, 'username': 'user{}'.format(i), 'email': 'user{}@example.com'.format(i),
+                 'password': password} for i in ids])
+            db.session.execute(UsersRoles.__table__.insert(), [{'user_id': i, 'role_id': 1} for i in ids])
+        db.session.execute(UsersRoles.__table__.insert(), [{'user_id': 1, 'role_id': 2}])
+        db.session.commit()
+
+    film_cache.clear()
+    credential_cache.clear()
+    role_registry.invalidate()
+    with app.app_context():
+        role_registry.load()
+
+    return Context(films, users, issue_token(Principal(1, 'user1', ('user', 'admin'))))
+
+
+def percentile(ordered, p):
+    """p-th percentile in ms of sorted latencies, interpolated between the two
+    closest samples as statistics.quantiles(method='inclusive') does; that
+    one needs Python 3.8."""
+    position = (len(ordered) - 1) * p / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return round((ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)) * 1000, 3)
+
+
+def run_scenario(client, counter, scenario, context, requests, warmup):
+    headers = {'Authorization': 'Bearer ' + context.token}
+
+    def call(i):
+        url, kwargs = scenario.request(i, context)
+        kwargs = dict(kwargs)
+        kwargs['headers'] = dict(headers, **kwargs.get('headers', {}))
+        return client.open(url, method=scenario.method, **kwargs)
+
+    if scenario.warmup:
+        for i in range(warmup):
+            call(requests + i)
+
+    latencies, errors = [], 0
+    counter.statements = 0
+    started = perf_counter()
+    for i in range(requests):
+        request_started = perf_counter()
+        response = call(i)
+        latencies.append(perf_counter() - request_started)
+        if response.status_code != 200:
+            errors += 1
+    elapsed = perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': requests,
+        'errors': errors,
+        'throughput_rps': round(requests / elapsed, 1),
+        'p50_ms': percentile(latencies, 50),
+        'p95_ms': percentile(latencies, 95),
+        'p99_ms': percentile(latencies, 99),
+        'queries_per_request': round(counter.statements / requests, 2)
+    }
+
+
+def compare(results, baseline, threshold):
+    """Regressions of results against baseline, as messages."""
+    regressions = []
+    for scale, routes in results.items():
+        for route, current in routes.items():
+            previous = baseline.get(scale, {}).get(route)
+            if previous is None:
+                continue
+
+            name = '{} at {} films'.format(route, scale)
+            for key in ('p50_ms', 'p95_ms'):
+                if current[key] > previous[key] * (1 + threshold):
+                    regressions.append('{}: {} {} -> {}'.format(name, key, previous[key], current[key]))
+            if current['throughput_rps'] < previous['throughput_rps'] / (1 + threshold):
+                regressions.append('{}: throughput_rps {} -> {}'.format(
+                    name, previous['throughput_rps'], current['throughput_rps']))
+            if current['queries_per_request'] > previous['queries_per_request']:
+                regressions.append('{}: queries_per_request {} -> {}'.format(
+                    name, previous['queries_per_request'], current['queries_per_request']))
+            if current['errors'] > previous['errors']:
+                regressions.append('{}: errors {} -> {}'.format(name, previous['errors'], current['errors']))
+    return regressions
+
+
+def print_table(scale, routes):
+    print('\n{} films'.format(scale))
+    print('{:<28}{:>9}{:>10}{:>10}{:>10}{:>10}{:>9}'.format(
+        '', 'req/s', 'p50 ms', 'p95 ms', 'p99 ms', 'queries', 'errors'))
+    for route, result in routes.items():
+        print('{:<28}{:>9.1f}{:>10.2f}{:>10.2f}{:>10.2f}{:>10.2f}{:>9}'.format(
+            route, result['throughput_rps'], result['p50_ms'], result['p95_ms'], result['p99_ms'],
+            result['queries_per_request'], result['errors']))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Route benchmark suite.')
+    parser.add_argument('--scales', default='1000,100000,1000000',
+                        help='comma separated film counts, one seeded database each')
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--routes', default='', help='only run routes whose name contains this text')
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--baseline', help='JSON results of an earlier run to compare against')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='allowed slowdown before a route counts as regressed (0.25 = 25%%)')
+    parser.add_argument('--force', action='store_true',
+                        help='allow dropping a database that is not a temporary one')
+    args = parser.parse_args()
+
+    scales = [int(scale) for scale in args.scales.split(',')]
+    scenarios = [scenario for scenario in SCENARIOS if args.routes in scenario.name]
+    # deletes walk down from the last id, keep them clear of the writes above
+    if args.requests + args.warmup > min(min(scales), args.users) // 2:
+        parser.error('--requests plus --warmup should be at most half of the smallest scale and of --users')
+
+    with app.app_context():
+        dialect = db.engine.dialect.name
+        temporary = DATABASE is not None or dialect == 'sqlite' and db.engine.url.database in (None, '', ':memory:')
+        if not temporary and not args.force:
+            parser.error('every scale drops and recreates the schema of {}, pass --force to allow it'.format(
+                db.engine.url.render_as_string(hide_password=True)))
+        counter = QueryCounter()
+        event.listen(db.engine, 'before_cursor_execute', counter.on_execute)
+
+    client = app.test_client()
+    results = {}
+    for scale in scales:
+        context = seed(scale, args.users)
+        results[str(scale)] = {}
+        for scenario in scenarios:
+            requests = min(args.requests, HASHING_REQUESTS) if scenario.hashing else args.requests
+            results[str(scale)][scenario.name] = run_scenario(client, counter, scenario, context,
+                                                              requests, args.warmup)
+        print_table(scale, results[str(scale)])
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump({'created_at': datetime.now().isoformat(timespec='seconds'),
+                       'python': platform.python_version(),
+                       'database': dialect,
+                       'results': results}, output, indent=2)
+
+    if DATABASE:
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(DATABASE + suffix):
+                os.remove(DATABASE + suffix)
+
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            regressions = compare(results, json.load(baseline)['results'], args.threshold)
+        if regressions:
+            print('\nRegressions against {}:'.format(args.baseline))
+            for regression in regressions:
+                print('  ' + regression)
+            sys.exit(1)
+        print('\nNo regressions against {}.'.format(args.baseline))
+
+
+if __name__ == '__main__':
+    main()
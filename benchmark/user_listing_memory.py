@@ -0,0 +1,87 @@
+"""Peak Python memory of listing every user: the old load-everything approach
+(User.query.all() with lazily loaded roles) against walking GET /users page
+by page.
+
+    python -m benchmark.user_listing_memory [--users 100000] [--limit 500]
+
+Uses a temporary SQLite file unless SQLALCHEMY_DATABASE_URI is set.
+"""
+import argparse
+import os
+import tempfile
+import tracemalloc
+from time import perf_counter
+
+_, DATABASE = tempfile.mkstemp(suffix='.db')
+os.environ.setdefault('SQLALCHEMY_DATABASE_URI', 'sqlite:///' + DATABASE)
+
+from src.app import app, db
+from src.model import User, Role, issue_token
+from src.model.user import UsersRoles, Principal
+import src.route
+
+
+def seed(users):
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([Role(id=1, name='user'), Role(id=2, name='admin')])
+        db.session.commit()
+
+        batch = 10000
+        for start in range(1, users + 1, batch):
+            ids = range(start, min(start + batch, users + 1))
+            db.session.execute(User.__table__.insert(), [
+                {'id': i, 'username': 'user{}'.format(i), 'email': 'user{}@example.com'.format(i),
+                 'password': 'not-a-real-hash'} for i in ids])
+            db.session.execute(UsersRoles.__table__.insert(), [
+                {'user_id': i, 'role_id': 1} for i in ids])
+        db.session.commit()
+
+
+def load_all():
+    with app.app_context():
+        return len([user.to_json() for user in User.query.all()])
+
+
+def walk_pages(limit):
+    client = app.test_client()
+    headers = {'Authorization': 'Bearer ' + issue_token(Principal(0, 'bench', ('user', 'admin')))}
+    count, after = 0, None
+    while True:
+        url = '/users?limit={}'.format(limit) + ('&after={}'.format(after) if after else '')
+        page = client.get(url, headers=headers).get_json()
+        count += len(page['users'])
+        after = page['next_cursor']
+        if after is None:
+            return count
+
+
+def measure(func, *args):
+    tracemalloc.start()
+    started = perf_counter()
+    count = func(*args)
+    elapsed = perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return count, peak / 2 ** 20, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--limit', type=int, default=500)
+    parser.add_argument('--skip-load-all', action='store_true')
+    args = parser.parse_args()
+
+    seed(args.users)
+
+    print('{:<24}{:>10}{:>14}{:>10}'.format('', 'users', 'peak MiB', 'seconds'))
+    if not args.skip_load_all:
+        print('{:<24}{:>10}{:>14.1f}{:>10.1f}'.format('User.query.all()', *measure(load_all)))
+    print('{:<24}{:>10}{:>14.1f}{:>10.1f}'.format('GET /users pages', *measure(walk_pages, args.limit)))
+
+    os.remove(DATABASE)
+
+
+if __name__ == '__main__':
+    main()
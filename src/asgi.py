@@ -0,0 +1,242 @@
+"""ASGI entry point for the read endpoints, next to the waitress app:
+
+    GET /film/<filmId>
+    GET /user/<userId>
+    GET /user/name/<username>
+
+Rows are read with async SQLAlchemy sessions on the same models, so a slow
+client or query holds a coroutine instead of one of waitress' threads.
+Needs an ASGI server and the async driver of the database (aiosqlite for
+sqlite, aiomysql for mysql), none of which the waitress app requires:
+
+    uvicorn --factory src.asgi:create_asgi_app --port 5001
+
+Writes, listings and the admin routes stay on waitress; put both behind the
+same proxy and send these GETs here. Responses match the waitress ones:
+same payloads, ETags, 304s, error format and X-Request-ID. The film cache
+is not used, as writes made by the other process would not invalidate it.
+Token revocations made on waitress are read from user.token_generation,
+like waitress does, so they reach this process within AUTH_TOKEN_REFRESH
+seconds.
+"""
+import asyncio
+import re
+from base64 import b64decode
+from binascii import Error as Base64Error
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from werkzeug.http import parse_etags, quote_etag
+
+from src.app import app, db
+from src.config import get_async_database_uri, get_async_engine_options
+from src.error_handler.exception_wrapper import handle_error_format
+from src.json_provider import COMPACT_SEPARATORS
+from src.model import Film, User, Role
+from src.model.film import serialize_film
+from src.model.hashing import HashingSaturatedError
+from src.model.token import load_token, token_generations
+from src.model.user import Principal, UsersRoles, credential_cache, serialize_user
+from src.request_context import REQUEST_ID_HEADER, bind_request_id, current_request_id, log_exception, \
+    unbind_request_id
+from src.route.conditional import make_etag
+
+ROUTES = [
+    (re.compile(r'/film/(?P<film_id>[^/]+)'), 'get_film'),
+    (re.compile(r'/user/name/(?P<username>[^/]+)'), 'get_user_by_username'),
+    (re.compile(r'/user/(?P<user_id>[^/]+)'), 'get_user'),
+]
+
+
+def parse_id(value):
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+
+class Response:
+
+    def __init__(self, status, body=b'', content_type=None, headers=None):
+        self.status = status
+        self.body = body
+        self.headers = dict(headers or {})
+        if content_type:
+            self.headers['Content-Type'] = content_type
+
+    @classmethod
+    def json(cls, payload, status=200, headers=None):
+        body = app.json.dumps(payload, separators=COMPACT_SEPARATORS) + '\n'
+        return cls(status, body.encode('utf-8'), app.json.mimetype, headers)
+
+    async def send(self, send):
+        headers = [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in self.headers.items()]
+        headers.append((b'content-length', str(len(self.body)).encode('latin-1')))
+        await send({'type': 'http.response.start', 'status': self.status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': self.body})
+
+
+def auth_error(status, scheme):
+    headers = {'WWW-Authenticate': '{} realm="Authentication Required"'.format(scheme)} if status == 401 else None
+    return Response(status, b'Unauthorized Access', 'text/html; charset=utf-8', headers)
+
+
+class ReadApp:
+    """The ASGI application. One AsyncSession per request, closed before the
+    response is sent."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self.handle(scope, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.engine.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def handle(self, scope, send):
+        headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope['headers']}
+        token = bind_request_id(headers.get(REQUEST_ID_HEADER.lower()))
+        try:
+            response = await self.dispatch(scope['method'], scope['path'], headers)
+            response.headers[REQUEST_ID_HEADER] = current_request_id()
+            await response.send(send)
+        finally:
+            unbind_request_id(token)
+
+    async def dispatch(self, method, path, headers):
+        for pattern, name in ROUTES:
+            match = pattern.fullmatch(path)
+            if match:
+                break
+        else:
+            return Response.json(handle_error_format('Resource does not exist.', 'Path.'), 404)
+
+        if method != 'GET':
+            return Response.json(handle_error_format('Only GET is served here.', 'Method.'), 405, {'Allow': 'GET'})
+
+        try:
+            async with self.session_factory() as session:
+                principal, scheme = await self.authenticate(session, headers.get('authorization', ''))
+                if principal is None:
+                    return auth_error(401, scheme)
+                if 'user' not in principal.roles:
+                    return auth_error(403, scheme)
+
+                return await getattr(self, name)(session, headers, **match.groupdict())
+        except HashingSaturatedError as e:
+            # as handle_service_unavailable answers on waitress
+            return Response.json(handle_error_format(e.description, 'Server.'), 503, {'Retry-After': '1'})
+        except Exception as e:
+            log_exception(e)
+            return Response.json({'traceId': current_request_id(), 'errors': [str(type(e)), str(e)]}, 500)
+
+    async def authenticate(self, session, authorization):
+        """(Principal or None, scheme) the same way as src.app.auth: a bearer
+        token, else Basic credentials through the credential cache."""
+        scheme, _, credentials = authorization.partition(' ')
+        if scheme.lower() == 'bearer':
+            return load_token(credentials.strip()), 'Bearer'
+
+        if scheme.lower() != 'basic':
+            return None, 'Basic'
+        try:
+            username, _, password = b64decode(credentials).decode('utf-8').partition(':')
+        except (Base64Error, UnicodeDecodeError):
+            return None, 'Basic'
+
+        user, roles = await self.get_user_with_roles(session, User.username == username)
+        if not user:
+            return None, 'Basic'
+
+        principal = Principal(user.id, user.username, roles)
+        if credential_cache.check(username, password, user.password):
+            return principal, 'Basic'
+
+        # hashing waits on the process pool, off the event loop
+        if await asyncio.get_running_loop().run_in_executor(None, User.verify_hash, password, user.password):
+            credential_cache.remember(username, password, user.password)
+            return principal, 'Basic'
+        return None, 'Basic'
+
+    async def get_film(self, session, headers, film_id):
+        film_id = parse_id(film_id)
+        film = (await session.execute(select(Film).where(Film.id == film_id))).scalar() \
+            if film_id is not None else None
+        if not film:
+            return Response.json(handle_error_format('Film with such id does not exist.',
+                                                     'Field \'filmId\' in path parameters.'), 404)
+
+        return conditional_json(headers, make_etag(film.id, film.version), serialize_film(film))
+
+    async def get_user(self, session, headers, user_id):
+        user_id = parse_id(user_id)
+        user, roles = await self.get_user_with_roles(session, User.id == user_id) \
+            if user_id is not None else (None, ())
+        if not user:
+            return Response.json(handle_error_format('User with such id does not exist.',
+                                                     'Field \'userId\' in path parameters.'), 404)
+
+        return conditional_json(headers, make_etag(user.id, user.version),
+                                dict(serialize_user(user), roles=list(roles)))
+
+    async def get_user_by_username(self, session, headers, username):
+        user, roles = await self.get_user_with_roles(session, User.username == username)
+        if not user:
+            return Response.json(handle_error_format('User with such username does not exist.',
+                                                     'Field \'username\' in path parameters.'), 404)
+
+        return Response.json(dict(serialize_user(user), roles=list(roles)))
+
+    @staticmethod
+    async def get_user_with_roles(session, condition):
+        """A user and its role names in one query, in the order User.roles
+        gives them."""
+        rows = (await session.execute(
+            select(User, Role.name)
+            .outerjoin(UsersRoles, UsersRoles.user_id == User.id)
+            .outerjoin(Role, Role.id == UsersRoles.role_id)
+            .where(condition)
+            .order_by(UsersRoles.id))).all()
+        if not rows:
+            return None, ()
+
+        return rows[0][0], tuple(name for _, name in rows if name is not None)
+
+
+def conditional_json(headers, etag, payload):
+    """The payload with its ETag, or a bodiless 304 when If-None-Match
+    already names it."""
+    etag_headers = {'ETag': quote_etag(etag)}
+    if parse_etags(headers.get('if-none-match')).contains_weak(etag):
+        return Response(304, headers=etag_headers)
+    return Response.json(payload, headers=etag_headers)
+
+
+def create_asgi_app():
+    """Factory for the ASGI server: checks the schema and loads the token
+    generations like src.app.create_app, and opens an async engine on the
+    configured database."""
+    from src.model.schema import bootstrap_schema
+
+    bootstrap_schema(app)
+    with app.app_context():
+        token_generations.load()
+        # the engine's URL has relative sqlite paths resolved to the instance folder
+        database_uri = db.engine.url.render_as_string(hide_password=False)
+    token_generations.start_refresh(app.config['AUTH_TOKEN_REFRESH'])
+
+    engine = create_async_engine(get_async_database_uri(database_uri), **get_async_engine_options(database_uri))
+    return ReadApp(engine)
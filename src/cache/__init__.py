@@ -0,0 +1,3 @@
+from src.cache.ttl_cache import TTLCache
+from src.cache.credential_cache import CredentialCache
+from src.cache.read_through import ReadThroughCache
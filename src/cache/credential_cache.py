@@ -0,0 +1,37 @@
+import hmac
+from hashlib import sha256
+from secrets import token_bytes
+
+from src.cache.ttl_cache import TTLCache
+
+
+class CredentialCache:
+    """Remembers recently verified Basic auth credentials so that repeated
+    requests skip PBKDF2.
+
+    Only an HMAC of (username, password, stored hash) under a per-process
+    random key is kept, never the password itself. The stored hash is part of
+    the digest, so a password change invalidates the entry on its own.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._key = token_bytes(32)
+        self._entries = TTLCache(maxsize, ttl)
+
+    def _digest(self, username, password, password_hash):
+        message = '\0'.join((username, password, password_hash)).encode('utf-8')
+        return hmac.new(self._key, message, sha256).digest()
+
+    def check(self, username, password, password_hash):
+        digest = self._entries.get(username)
+        return digest is not None and hmac.compare_digest(
+            digest, self._digest(username, password, password_hash))
+
+    def remember(self, username, password, password_hash):
+        self._entries.set(username, self._digest(username, password, password_hash))
+
+    def forget(self, username):
+        self._entries.pop(username)
+
+    def clear(self):
+        self._entries.clear()
@@ -0,0 +1,54 @@
+from threading import Lock
+from time import monotonic
+
+from src.cache.ttl_cache import TTLCache
+
+_MISSING = object()
+
+
+class ReadThroughCache:
+    """TTLCache that loads missing entries itself.
+
+    A load that overlaps any invalidate() is returned to its caller but not
+    stored, so a reader racing a writer cannot put the old row back after the
+    writer has invalidated it. Writes are rare, so the cost is an occasional
+    extra load. load must see the data as of the call, not as of a snapshot
+    taken earlier, e.g. by reading on a connection of its own.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, timer=monotonic):
+        self._entries = TTLCache(maxsize, ttl, timer)
+        self._lock = Lock()
+        self._generation = 0
+        self.loads = 0
+
+    def get(self, key, load):
+        """Cached value of key, or load(key) if it is not cached. None results
+        are not cached."""
+        value = self._entries.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        generation = self._generation
+        value = load(key)
+
+        with self._lock:
+            self.loads += 1
+            if value is not None and self._generation == generation:
+                self._entries.set(key, value)
+        return value
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key)
+            self._generation += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+    def stats(self):
+        stats = self._entries.stats()
+        stats['loads'] = self.loads
+        return stats
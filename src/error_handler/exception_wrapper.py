@@ -1,15 +1,18 @@
-import uuid
-from sys import exc_info as stack_trace
+from werkzeug.exceptions import HTTPException
+from src.request_context import current_request_id, log_exception
 
 
 def handle_server_exception(func):
     def wrapper(*args, **kwargs):
         try:
             return func(*args, **kwargs)
+        except HTTPException:
+            raise
         except BaseException as e:
+            log_exception(e)
             return {
-                       'traceId': str(uuid.uuid1()),
-                       'errors': [str(error) for error in stack_trace()]
+                       'traceId': current_request_id(),
+                       'errors': [str(type(e)), str(e)]
                    }, 500
 
     wrapper.__name__ = func.__name__
@@ -18,7 +21,7 @@ def handle_server_exception(func):
 
 def handle_error_format(message: str, source: str):
     return {
-        'traceId': str(uuid.uuid1()),
+        'traceId': current_request_id(),
         'errors': [
             {
                 'message': message,
@@ -26,3 +29,7 @@ def handle_error_format(message: str, source: str):
             }
         ]
     }
+
+
+def handle_service_unavailable(e):
+    return handle_error_format(e.description, 'Server.'), 503, {'Retry-After': '1'}
@@ -0,0 +1,126 @@
+import json
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+from flask import current_app, g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from src.metrics import record_request
+from src.request_context import current_request_id
+
+logger = logging.getLogger('src.request')
+
+# every collector active in this context: the request's, plus any opened by
+# assert_max_queries() around it
+_collectors = ContextVar('query_collectors', default=())
+
+
+class QueryStats:
+    """Statement count and cumulative database time of one request or block."""
+
+    def __init__(self, keep_statements=False):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = [] if keep_statements else None
+
+    def record(self, statement, duration):
+        self.count += 1
+        self.duration += duration
+        if self.statements is not None:
+            self.statements.append(statement)
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(perf_counter())
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = perf_counter() - conn.info['query_started'].pop()
+    for stats in _collectors.get():
+        stats.record(statement, duration)
+
+
+def handle_error(exception_context):
+    started = exception_context.connection.info.get('query_started') if exception_context.connection else None
+    if started:
+        started.pop()
+
+
+def push_collector(stats):
+    return _collectors.set(_collectors.get() + (stats,))
+
+
+def start_request():
+    g.query_stats = QueryStats()
+    g.request_started = perf_counter()
+    g.query_stats_token = push_collector(g.query_stats)
+
+
+def finish_request(response):
+    stats = g.get('query_stats')
+    if stats is None:
+        return response
+
+    duration = perf_counter() - g.request_started
+    if current_app.config['METRICS']:
+        # the rule, not the path, so ids do not multiply the series
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        record_request(endpoint, request.method, response.status_code, duration, stats.duration, stats.count)
+
+    if current_app.config['SERVER_TIMING']:
+        response.headers.add('Server-Timing', 'db;dur={:.3f};desc="{} queries", app;dur={:.3f}'.format(
+            stats.duration * 1000, stats.count, duration * 1000))
+
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(json.dumps({
+            'request_id': current_request_id(),
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': stats.count,
+            'db_ms': round(stats.duration * 1000, 3),
+            'duration_ms': round(duration * 1000, 3)
+        }))
+    return response
+
+
+def end_request(exception):
+    token = g.pop('query_stats_token', None)
+    if token is not None:
+        _collectors.reset(token)
+
+
+def install_query_stats(app):
+    """Counts statements and database time per request, for the Server-Timing
+    header (SERVER_TIMING), the metrics in src.metrics (METRICS) and an INFO
+    line on the 'src.request' logger."""
+    event.listen(Engine, 'before_cursor_execute', before_cursor_execute)
+    event.listen(Engine, 'after_cursor_execute', after_cursor_execute)
+    event.listen(Engine, 'handle_error', handle_error)
+
+    app.before_request(start_request)
+    app.after_request(finish_request)
+    app.teardown_request(end_request)
+
+
+@contextmanager
+def assert_max_queries(limit):
+    """Fails with the statements that ran when the block issues more than
+    limit queries:
+
+        with assert_max_queries(2):
+            client.get('/user/1', headers=headers)
+    """
+    stats = QueryStats(keep_statements=True)
+    token = push_collector(stats)
+    try:
+        yield stats
+    finally:
+        _collectors.reset(token)
+
+    if stats.count > limit:
+        raise AssertionError('{} queries issued, at most {} expected:\n{}'.format(
+            stats.count, limit, '\n'.join('  ' + statement for statement in stats.statements)))
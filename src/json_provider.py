@@ -0,0 +1,60 @@
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+
+COMPACT_SEPARATORS = (',', ':')
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson.
+
+    Responses match DefaultJSONProvider: sorted keys, compact separators,
+    dates and datetimes as HTTP dates (orjson hands them to the same default
+    function). Non-ASCII text is written as UTF-8 instead of \\u escapes.
+    dumps() uses orjson when asked for compact separators; anything else,
+    such as indent or the stdlib's spaced separators, and debug mode pretty
+    printing fall back to the stdlib encoder.
+    """
+
+    ensure_ascii = False
+
+    OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS if orjson else 0
+    SORTED_OPTIONS = OPTIONS | orjson.OPT_SORT_KEYS if orjson else 0
+    SUPPORTED_KWARGS = {'sort_keys', 'separators'}
+
+    def dumps(self, obj, **kwargs):
+        if kwargs.keys() - self.SUPPORTED_KWARGS or kwargs.get('separators') != COMPACT_SEPARATORS:
+            return super().dumps(obj, **kwargs)
+        return self.dumps_bytes(obj, kwargs.get('sort_keys', self.sort_keys)).decode('utf-8')
+
+    def dumps_bytes(self, obj, sort_keys=True, newline=False):
+        option = self.SORTED_OPTIONS if sort_keys else self.OPTIONS
+        if newline:
+            option |= orjson.OPT_APPEND_NEWLINE
+        return orjson.dumps(obj, default=self.default, option=option)
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)
+
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj, self.sort_keys, newline=True),
+                                        mimetype=self.mimetype)
+
+
+def get_json_provider_class(backend):
+    """orjson when asked for and installed, else Flask's stdlib provider."""
+    if backend not in ('orjson', 'stdlib'):
+        raise ValueError('JSON_BACKEND should be one of: orjson, stdlib.')
+    if backend == 'orjson' and orjson is not None:
+        return OrjsonProvider
+    return DefaultJSONProvider
@@ -0,0 +1,117 @@
+from bisect import bisect_left
+from threading import Lock
+
+# seconds; request latency and database time share the same buckets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+# PBKDF2 verification sits in the tens of milliseconds by design
+HASHING_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def format_labels(names, values, extra=''):
+    pairs = ['{}="{}"'.format(name, escape_label(value)) for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Counter:
+    """Thread-safe counter per label values."""
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values):
+        return self._values.get(label_values, 0)
+
+    def render(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = ['# HELP {} {}'.format(self.name, self.documentation), '# TYPE {} counter'.format(self.name)]
+        lines.extend('{}{} {}'.format(self.name, format_labels(self.labels, label_values), value)
+                     for label_values, value in values)
+        return lines
+
+
+class Histogram:
+    """Thread-safe histogram per label values, rendered with cumulative
+    buckets as Prometheus expects."""
+
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # label values -> [count per bucket..., +Inf count, sum]
+        self._values = {}
+        self._lock = Lock()
+
+    def observe(self, seconds, *label_values):
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            values = self._values.get(label_values)
+            if values is None:
+                values = self._values[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            values[index] += 1
+            values[-1] += seconds
+
+    def count(self, *label_values):
+        values = self._values.get(label_values)
+        return sum(values[:-1]) if values else 0
+
+    def render(self):
+        with self._lock:
+            values = sorted((label_values, list(counts)) for label_values, counts in self._values.items())
+        lines = ['# HELP {} {}'.format(self.name, self.documentation), '# TYPE {} histogram'.format(self.name)]
+        for label_values, counts in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                lines.append('{}_bucket{} {}'.format(
+                    self.name, format_labels(self.labels, label_values, 'le="{}"'.format(bound)), cumulative))
+            labels = format_labels(self.labels, label_values)
+            lines.append('{}_sum{} {:.6f}'.format(self.name, labels, counts[-1]))
+            lines.append('{}_count{} {}'.format(self.name, labels, cumulative))
+        return lines
+
+
+http_requests = Counter('http_requests_total', 'Requests served, by route, method and status.',
+                        ('endpoint', 'method', 'status'))
+http_request_duration = Histogram('http_request_duration_seconds', 'Time to serve a request, by route.',
+                                  ('endpoint', 'method'))
+http_request_db_duration = Histogram('http_request_db_seconds', 'Time a request spent in SQL statements, by route.',
+                                     ('endpoint', 'method'))
+http_request_queries = Counter('http_request_queries_total', 'SQL statements run by requests, by route.',
+                               ('endpoint', 'method'))
+password_verify_duration = Histogram('password_verify_seconds', 'Time to verify a password hash, queueing included.',
+                                     buckets=HASHING_BUCKETS)
+
+METRICS = (http_requests, http_request_duration, http_request_db_duration, http_request_queries,
+           password_verify_duration)
+
+
+def record_request(endpoint, method, status, duration, db_duration, queries):
+    http_requests.inc(endpoint, method, status)
+    http_request_duration.observe(duration, endpoint, method)
+    http_request_db_duration.observe(db_duration, endpoint, method)
+    if queries:
+        http_request_queries.inc(endpoint, method, amount=queries)
+
+
+def render_metrics(metrics=METRICS):
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
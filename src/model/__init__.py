@@ -1,3 +1,3 @@
 from src.model.user import User, Role
 from src.model.film import Film, State
-
+from src.model.token import issue_token, revoke_tokens
@@ -0,0 +1,18 @@
+import re
+
+# MySQL names an unnamed unique key after its column, newer servers prefix
+# the table: Duplicate entry 'x' for key 'user.username'
+UNIQUE_VIOLATION_PATTERNS = (
+    re.compile(r"Duplicate entry '.*' for key '(?:\w+\.)?(?P<column>\w+)'"),
+    re.compile(r'UNIQUE constraint failed: \w+\.(?P<column>\w+)'),
+)
+
+
+def get_unique_violation(error):
+    """Column of the unique constraint an IntegrityError broke, or None if it
+    was not a unique violation."""
+    message = str(getattr(error, 'orig', error))
+    for pattern in UNIQUE_VIOLATION_PATTERNS:
+        match = pattern.search(message)
+        if match:
+            return match.group('column')
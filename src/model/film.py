@@ -1,6 +1,11 @@
-from src.app import db
+import re
+from src.app import app, db
+from src.cache import ReadThroughCache
+from src.model.serializers import compile_serializer
 from strenum import StrEnum
-from sqlalchemy import Enum
+from sqlalchemy import Enum, and_, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
 from src.error_handler.exception_wrapper import handle_error_format
 from src.error_handler.exception_wrapper import handle_server_exception
 
@@ -8,6 +13,33 @@ class State(StrEnum):
     Done = 'Done'
     InProduction = 'InProduction'
 
+
+film_cache = ReadThroughCache(app.config['FILM_CACHE_SIZE'], app.config['FILM_CACHE_TTL'])
+
+DURATION_PATTERN = re.compile(
+    r'^\s*(?:(?P<clock_hours>\d+):(?P<clock_minutes>[0-5]?\d)'
+    r'|(?:(?P<hours>\d+)\s*h(?:ours?|rs?)?)?\s*(?:(?P<minutes>\d+)\s*m?(?:in(?:utes?)?)?)?)\s*$',
+    re.IGNORECASE)
+
+
+def parse_duration(value):
+    """Film duration in whole minutes from an int or a string such as '100',
+    '100 min', '1h 40m' or '1:40'."""
+    if isinstance(value, int) and not isinstance(value, bool):
+        minutes = value
+    else:
+        match = DURATION_PATTERN.match(str(value))
+        if not match or not any(match.groups()):
+            raise ValueError('duration should be a number of minutes.')
+        parts = match.groupdict()
+        hours = parts['clock_hours'] or parts['hours'] or 0
+        minutes = int(hours) * 60 + int(parts['clock_minutes'] or parts['minutes'] or 0)
+
+    if minutes <= 0:
+        raise ValueError('duration should be a positive number of minutes.')
+
+    return minutes
+
 # class Status(db.Model):
 #     id = db.Column(db.Integer, primary_key=True)
 #     name = db.Column(db.String, unique=True, nullable=False)
@@ -17,10 +49,22 @@ class State(StrEnum):
 class Film(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(45), unique=True, nullable=False)
-    duration = db.Column(db.String(45), nullable=False)
+    # minutes
+    duration = db.Column(db.Integer, nullable=False)
     state = db.Column(Enum(State), nullable=False)
     # status_id = db.Column(db.Integer, db.ForeignKey('status.id'), nullable=False)
     created_at = db.Column(db.Date)
+    # bumped on every UPDATE, used for ETags and If-Match
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+
+    __mapper_args__ = {'version_id_col': version}
+
+    __table_args__ = (
+        db.Index('ix_film_state_id', 'state', 'id'),
+        db.Index('ix_film_created_at_id', 'created_at', 'id'),
+        db.Index('ix_film_state_created_at_id', 'state', 'created_at', 'id'),
+        db.Index('ix_film_duration', 'duration'),
+    )
 
     def to_json(self):
         return {
@@ -34,15 +78,107 @@ class Film(db.Model):
     def save_to_db(self):
         db.session.add(self)
         db.session.commit()
+        film_cache.invalidate(self.id)
 
     @classmethod
     def get_by_id(cls, film_id):
         return cls.query.filter_by(id=film_id).first()
 
+    @classmethod
+    def get_cached(cls, film_id):
+        """(version, to_json()) of a film through film_cache, or None if there
+        is no such film. Misses are not cached, so new films show up at once."""
+        try:
+            film_id = int(film_id)
+        except (TypeError, ValueError):
+            return None
+
+        return film_cache.get(film_id, cls._load_cached)
+
+    @classmethod
+    def get_latest(cls, film_id):
+        """get_by_id() on a session and connection of its own, detached. The
+        request's transaction may have started before the caller's check,
+        and under REPEATABLE READ would keep returning the row as it was
+        then."""
+        with Session(db.engine) as session:
+            return session.get(cls, film_id)
+
+    @classmethod
+    def _load_cached(cls, film_id):
+        # read after film_cache took its generation, see ReadThroughCache
+        film = cls.get_latest(film_id)
+        return (film.version, serialize_film(film)) if film else None
+
     @classmethod
     def get_by_name(cls, film_name):
         return cls.query.filter_by(name=film_name).first()
 
+    @classmethod
+    def get_durations(cls, film_ids):
+        if not film_ids:
+            return {}
+
+        return dict(db.session.query(cls.id, cls.duration).filter(cls.id.in_(film_ids)))
+
+    @classmethod
+    def get_max_duration(cls):
+        """Read from the end of ix_film_duration."""
+        return db.session.query(db.func.max(cls.duration)).scalar() or 0
+
+    @classmethod
+    def get_existing_names(cls, names):
+        if not names:
+            return set()
+
+        return {name for name, in db.session.query(cls.name).filter(cls.name.in_(names))}
+
+    @classmethod
+    def insert_many(cls, rows):
+        """One executemany INSERT and one commit for the whole batch."""
+        db.session.execute(cls.__table__.insert(), rows)
+        db.session.commit()
+
+    @classmethod
+    def insert_one(cls, row):
+        """Inserts a row inside a savepoint, so a unique violation only loses
+        that row. The caller commits."""
+        try:
+            with db.session.begin_nested():
+                db.session.execute(cls.__table__.insert(), [row])
+            return True
+        except IntegrityError:
+            return False
+
+    @classmethod
+    def get_page(cls, after=None, limit=50, state=None, created_from=None, created_to=None):
+        """Keyset pagination: seeks past the last row of the previous page
+        instead of using OFFSET. Without a created_at filter pages are ordered
+        by id and after is that id; with one they are ordered by
+        (created_at, id), read in order from ix_film_created_at_id (or
+        ix_film_state_created_at_id) without sorting the range, and after is
+        the (created_at, id) of that row."""
+        query = cls.query
+        by_created_at = created_from is not None or created_to is not None
+
+        if state is not None:
+            query = query.filter(cls.state == state)
+        if created_from is not None:
+            query = query.filter(cls.created_at >= created_from)
+        if created_to is not None:
+            query = query.filter(cls.created_at <= created_to)
+
+        if not by_created_at:
+            if after is not None:
+                query = query.filter(cls.id > after)
+            return query.order_by(cls.id).limit(limit).all()
+
+        if after is not None:
+            after_date, after_id = after
+            query = query.filter(or_(cls.created_at > after_date,
+                                     and_(cls.created_at == after_date, cls.id > after_id)))
+        return query.order_by(cls.created_at, cls.id).limit(limit).all()
+
 
     @classmethod
     def delete_by_id(cls, film_id):
@@ -56,11 +192,69 @@ class Film(db.Model):
 
         cls.query.filter_by(id=film_id).delete()
         db.session.commit()
+        # film is expired by the commit and its row is gone, use the copy
+        film_cache.invalidate(film_json['id'])
 
         return film_json
 
 
+# the payload of to_json() with dates and states already JSON native
+serialize_film = compile_serializer([Film.id, Film.name, Film.duration, Film.state, Film.created_at],
+                                    access='instance')
+
+
 class Schedule(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     film_id = db.Column(db.Integer, db.ForeignKey('film.id'), nullable=False)
     date = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_schedule_date', 'date'),
+        db.Index('ix_schedule_film_id_date', 'film_id', 'date'),
+    )
+
+    @staticmethod
+    def row_to_json(row):
+        return {
+            'id': row.id,
+            'film_id': row.film_id,
+            'film_name': row.film_name,
+            'date': row.date
+        }
+
+    @classmethod
+    def _query_with_film_name(cls):
+        return db.session.query(cls.id, cls.film_id, Film.name.label('film_name'), cls.date) \
+            .join(Film, Film.id == cls.film_id)
+
+    @classmethod
+    def get_between(cls, start, end, after=None, limit=50):
+        """Screenings in [start, end) with their film names, in one range scan
+        on ix_schedule_date. after is the (date, id) of the last row of the
+        previous page."""
+        query = cls._query_with_film_name().filter(cls.date >= start, cls.date < end)
+
+        if after is not None:
+            after_date, after_id = after
+            query = query.filter(or_(cls.date > after_date, and_(cls.date == after_date, cls.id > after_id)))
+
+        return query.order_by(cls.date, cls.id).limit(limit).all()
+
+    @classmethod
+    def get_starting_between(cls, start, end):
+        """(id, film_id, date, duration) of screenings starting in [start, end),
+        ordered by date, in one range scan on ix_schedule_date."""
+        return db.session.query(cls.id, cls.film_id, cls.date, Film.duration) \
+            .join(Film, Film.id == cls.film_id) \
+            .filter(cls.date >= start, cls.date < end) \
+            .order_by(cls.date) \
+            .all()
+
+    @classmethod
+    def get_next_for_film(cls, film_id, start, limit=10):
+        """The next screenings of one film, read from ix_schedule_film_id_date."""
+        return cls._query_with_film_name() \
+            .filter(cls.film_id == film_id, cls.date >= start) \
+            .order_by(cls.date, cls.id) \
+            .limit(limit) \
+            .all()
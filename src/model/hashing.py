@@ -0,0 +1,169 @@
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_all_start_methods, get_context
+from os import cpu_count
+from threading import BoundedSemaphore, Lock
+from passlib.hash import pbkdf2_sha256 as sha256
+from werkzeug.exceptions import ServiceUnavailable
+from src.app import app
+
+# forking a multithreaded waitress process can copy locks held by other
+# threads into the workers
+START_METHOD = 'forkserver' if 'forkserver' in get_all_start_methods() else 'spawn'
+
+
+class HashingSaturatedError(ServiceUnavailable):
+    description = 'Too many password checks in progress, please retry later.'
+
+
+def hash_password(password):
+    return sha256.hash(password)
+
+
+def verify_password(password, hash_):
+    return sha256.verify(password, hash_)
+
+
+# items per bulk job, small enough that interactive calls queued behind one
+# do not time out
+BULK_CHUNK_SIZE = 16
+
+
+def apply_each(func, items):
+    return [func(item) for item in items]
+
+
+class HashingExecutor:
+    """Runs PBKDF2 in a dedicated process pool so that password work never
+    holds the GIL of the waitress worker threads.
+
+    At most workers + queue_size jobs are in the pool at once; a call beyond
+    that fails immediately with HashingSaturatedError (503) instead of
+    queueing behind the others. A job keeps its slot until it leaves the
+    pool: a call that times out cancels its job if it has not started, and
+    one that is already running holds the slot until it finishes.
+    workers=0 hashes inline in the caller.
+    """
+
+    def __init__(self, workers: int, queue_size: int, timeout: float):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self._slots = BoundedSemaphore(workers + queue_size) if workers else None
+        self._pool = None
+        self._lock = Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.errors = 0
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=get_context(START_METHOD))
+            return self._pool
+
+    def _reset_pool(self):
+        with self._lock:
+            self._pool = None
+
+    def _submit(self, wait, func, *args):
+        """Takes a slot, waiting for one when wait is set, and submits the
+        job; the slot is given back when the job is done or cancelled."""
+        acquired = self._slots.acquire() if wait else self._slots.acquire(blocking=False)
+        if not acquired:
+            with self._lock:
+                self.rejected += 1
+            raise HashingSaturatedError()
+
+        with self._lock:
+            self.in_flight += 1
+        try:
+            future = self._get_pool().submit(func, *args)
+        except BaseException as e:
+            with self._lock:
+                self.in_flight -= 1
+                self.errors += 1
+            self._slots.release()
+            if isinstance(e, BrokenProcessPool):
+                self._reset_pool()
+            raise
+
+        future.add_done_callback(self._job_done)
+        return future
+
+    def _job_done(self, future):
+        with self._lock:
+            self.in_flight -= 1
+            # cancelled and timed out jobs are already counted in timeouts
+            if not future.cancelled() and not getattr(future, 'timed_out', False):
+                if future.exception() is None:
+                    self.completed += 1
+                else:
+                    self.errors += 1
+        self._slots.release()
+
+    def run(self, func, *args):
+        if not self.workers:
+            return func(*args)
+
+        future = self._submit(False, func, *args)
+        try:
+            return future.result(self.timeout)
+        except TimeoutError:
+            future.timed_out = True
+            with self._lock:
+                self.timeouts += 1
+            future.cancel()
+            raise HashingSaturatedError()
+        except BrokenProcessPool:
+            self._reset_pool()
+            raise
+
+    def map(self, func, items):
+        """func over items, in order, for bulk work. The items are split in
+        jobs of at most BULK_CHUNK_SIZE taking one slot each; a job waits for
+        its slot instead of failing, so bulk callers queue within the same
+        bound as run() and never use more cores than the pool has."""
+        items = list(items)
+        if not self.workers:
+            return [func(item) for item in items]
+
+        chunksize = max(1, min(BULK_CHUNK_SIZE, -(-len(items) // self.workers)))
+        futures = []
+        try:
+            for start in range(0, len(items), chunksize):
+                futures.append(self._submit(True, apply_each, func, items[start:start + chunksize]))
+            return [result for future in futures for result in future.result()]
+        except BaseException as e:
+            for future in futures:
+                future.cancel()
+            if isinstance(e, BrokenProcessPool):
+                self._reset_pool()
+            raise
+
+    def stats(self):
+        in_flight = self.in_flight
+        return {
+            'workers': self.workers,
+            'queue_size': self.queue_size,
+            'in_flight': in_flight,
+            'queued': max(0, in_flight - self.workers),
+            'completed': self.completed,
+            'rejected': self.rejected,
+            'timeouts': self.timeouts,
+            'errors': self.errors
+        }
+
+
+def hash_passwords(passwords, executor):
+    """Hashes many passwords on executor's pool, so bulk hashing is neither
+    serialized on the GIL nor able to take more cores than the pool has."""
+    return executor.map(hash_password, passwords)
+
+
+hashing_executor = HashingExecutor(app.config['HASHING_WORKERS'] if app.config['HASHING_WORKERS'] is not None
+                                   else cpu_count() or 1,
+                                   app.config['HASHING_QUEUE_SIZE'],
+                                   app.config['HASHING_TIMEOUT'])
@@ -13,7 +13,8 @@ config = context.config
 
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
-fileConfig(config.config_file_name)
+# keep the loggers of an app that runs migrations in process (SCHEMA_BOOTSTRAP)
+fileConfig(config.config_file_name, disable_existing_loggers=False)
 logger = logging.getLogger('alembic.env')
 
 # add your model's MetaData object here
@@ -74,6 +75,11 @@ def run_migrations_online():
     connectable = current_app.extensions['migrate'].db.get_engine()
 
     with connectable.connect() as connection:
+        # batch mode copies and drops SQLite tables, which must not fire
+        # ON DELETE actions; the pragma only applies outside a transaction
+        if connection.dialect.name == 'sqlite':
+            connection.exec_driver_sql('PRAGMA foreign_keys=OFF')
+
         context.configure(
             connection=connection,
             target_metadata=target_metadata,
@@ -84,6 +90,9 @@ def run_migrations_online():
         with context.begin_transaction():
             context.run_migrations()
 
+        if connection.dialect.name == 'sqlite':
+            connection.exec_driver_sql('PRAGMA foreign_keys=ON')
+
 
 if context.is_offline_mode():
     run_migrations_offline()
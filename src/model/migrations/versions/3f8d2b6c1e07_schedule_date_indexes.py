@@ -0,0 +1,27 @@
+"""schedule date indexes
+
+Revision ID: 3f8d2b6c1e07
+Revises: 7c1e4f2a9b3d
+Create Date: 2026-10-18 13:40:07.902114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f8d2b6c1e07'
+down_revision = '7c1e4f2a9b3d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # screenings between two dates, and the next screenings of one film
+    op.create_index('ix_schedule_date', 'schedule', ['date'], unique=False)
+    op.create_index('ix_schedule_film_id_date', 'schedule', ['film_id', 'date'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_schedule_film_id_date', table_name='schedule')
+    op.drop_index('ix_schedule_date', table_name='schedule')
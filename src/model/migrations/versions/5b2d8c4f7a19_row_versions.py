@@ -0,0 +1,30 @@
+"""row versions for film and user
+
+Revision ID: 5b2d8c4f7a19
+Revises: 9a4b7e1d5c22
+Create Date: 2026-10-18 16:21:43.518207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b2d8c4f7a19'
+down_revision = '9a4b7e1d5c22'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # bumped by the ORM on every UPDATE, see version_id_col in the models
+    op.add_column('film', sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+    op.add_column('user', sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('version')
+
+    with op.batch_alter_table('film', schema=None) as batch_op:
+        batch_op.drop_column('version')
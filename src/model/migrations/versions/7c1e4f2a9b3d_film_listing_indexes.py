@@ -0,0 +1,27 @@
+"""film listing indexes
+
+Revision ID: 7c1e4f2a9b3d
+Revises: 025eea1deb1c
+Create Date: 2026-10-18 10:12:41.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c1e4f2a9b3d'
+down_revision = '025eea1deb1c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # keyset pagination on film.id, filtered by state or created_at
+    op.create_index('ix_film_state_id', 'film', ['state', 'id'], unique=False)
+    op.create_index('ix_film_created_at_id', 'film', ['created_at', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_film_created_at_id', table_name='film')
+    op.drop_index('ix_film_state_id', table_name='film')
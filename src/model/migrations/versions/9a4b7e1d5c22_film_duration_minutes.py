@@ -0,0 +1,120 @@
+"""film duration in minutes
+
+Revision ID: 9a4b7e1d5c22
+Revises: 3f8d2b6c1e07
+Create Date: 2026-10-18 15:02:55.130877
+
+"""
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9a4b7e1d5c22'
+down_revision = '3f8d2b6c1e07'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 5000
+# unreadable durations named in the error message, the rest are counted
+MAX_REPORTED = 20
+
+# a frozen copy of src.model.film.parse_duration, so this migration keeps
+# working whatever happens to the model later
+DURATION_PATTERN = re.compile(
+    r'^\s*(?:(?P<clock_hours>\d+):(?P<clock_minutes>[0-5]?\d)'
+    r'|(?:(?P<hours>\d+)\s*h(?:ours?|rs?)?)?\s*(?:(?P<minutes>\d+)\s*m?(?:in(?:utes?)?)?)?)\s*$',
+    re.IGNORECASE)
+
+film = sa.table('film',
+                sa.column('id', sa.Integer),
+                sa.column('duration', sa.String),
+                sa.column('duration_minutes', sa.Integer))
+
+
+def parse_minutes(value):
+    match = DURATION_PATTERN.match(value or '')
+    if not match or not any(match.groups()):
+        return None
+    parts = match.groupdict()
+    hours = parts['clock_hours'] or parts['hours'] or 0
+    return int(hours) * 60 + int(parts['clock_minutes'] or parts['minutes'] or 0)
+
+
+def read_in_batches(connection, column):
+    """(id, film.<column>) of every film, BATCH_SIZE rows at a time, walking
+    the primary key, so no single statement locks the whole table."""
+    last_id = 0
+
+    while True:
+        rows = connection.execute(
+            sa.select(film.c.id, film.c[column])
+            .where(film.c.id > last_id)
+            .order_by(film.c.id)
+            .limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            return
+
+        yield rows
+        last_id = rows[-1][0]
+
+
+def copy_in_batches(source, target, convert):
+    """Copies film.<source> into film.<target> one batch at a time."""
+    connection = op.get_bind()
+    update = film.update() \
+        .where(film.c.id == sa.bindparam('film_id')) \
+        .values({target: sa.bindparam('value')})
+
+    for rows in read_in_batches(connection, source):
+        connection.execute(update, [{'film_id': film_id, 'value': convert(value)} for film_id, value in rows])
+
+
+def check_durations():
+    """Fails before any change to the schema when a duration cannot be
+    turned into a positive number of minutes: dropping the string column
+    would lose it, and there is no right value to store instead."""
+    unreadable = []
+    for rows in read_in_batches(op.get_bind(), 'duration'):
+        unreadable.extend((film_id, value) for film_id, value in rows if not parse_minutes(value))
+
+    if unreadable:
+        listed = ', '.join('{} ({!r})'.format(film_id, value) for film_id, value in unreadable[:MAX_REPORTED])
+        if len(unreadable) > MAX_REPORTED:
+            listed += ' and {} more'.format(len(unreadable) - MAX_REPORTED)
+        raise RuntimeError(
+            '{} film(s) have a duration that is not a positive number of minutes, film id (duration): {}. '
+            'Set them to e.g. \'95\', \'1h 35m\' or \'1:35\' and run the upgrade again.'.format(
+                len(unreadable), listed))
+
+
+def upgrade():
+    check_durations()
+
+    op.add_column('film', sa.Column('duration_minutes', sa.Integer(), nullable=True))
+    copy_in_batches('duration', 'duration_minutes', parse_minutes)
+
+    with op.batch_alter_table('film') as batch_op:
+        batch_op.drop_column('duration')
+        batch_op.alter_column('duration_minutes', new_column_name='duration',
+                              existing_type=sa.Integer(), nullable=False)
+
+    op.create_index('ix_film_duration', 'film', ['duration'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_film_duration', table_name='film')
+
+    with op.batch_alter_table('film') as batch_op:
+        batch_op.alter_column('duration', new_column_name='duration_minutes',
+                              existing_type=sa.Integer(), nullable=True)
+    op.add_column('film', sa.Column('duration', sa.String(length=45), nullable=True))
+
+    copy_in_batches('duration_minutes', 'duration', str)
+
+    with op.batch_alter_table('film') as batch_op:
+        batch_op.drop_column('duration_minutes')
+        batch_op.alter_column('duration', existing_type=sa.String(length=45), nullable=False)
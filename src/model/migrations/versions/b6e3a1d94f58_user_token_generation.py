@@ -0,0 +1,26 @@
+"""user token generation
+
+Revision ID: b6e3a1d94f58
+Revises: 5b2d8c4f7a19
+Create Date: 2026-10-18 21:04:12.730415
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6e3a1d94f58'
+down_revision = '5b2d8c4f7a19'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # carried by every issued token, bumped to revoke them, see src.model.token
+    op.add_column('user', sa.Column('token_generation', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('token_generation')
@@ -0,0 +1,25 @@
+"""film state and created_at index
+
+Revision ID: c4a7d2e8f613
+Revises: b6e3a1d94f58
+Create Date: 2026-10-18 21:47:30.118264
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4a7d2e8f613'
+down_revision = 'b6e3a1d94f58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # keyset pagination on (created_at, id) when state is filtered as well
+    op.create_index('ix_film_state_created_at_id', 'film', ['state', 'created_at', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_film_state_created_at_id', table_name='film')
@@ -0,0 +1,64 @@
+import heapq
+from datetime import datetime, timedelta
+from typing import NamedTuple, Optional
+from src.model.film import Film, Schedule
+
+
+class Screening(NamedTuple):
+    start: datetime
+    end: datetime
+    film_id: int
+    # position in the proposed batch, or id of an already scheduled screening
+    index: Optional[int] = None
+    schedule_id: Optional[int] = None
+
+    def to_json(self):
+        screening = {'film_id': self.film_id, 'start': self.start, 'end': self.end}
+        if self.index is not None:
+            screening['index'] = self.index
+        else:
+            screening['schedule_id'] = self.schedule_id
+        return screening
+
+
+def find_overlaps(screenings):
+    """Sweeps the screenings in start order, keeping the ones still running in
+    a heap ordered by end time. Returns every overlapping pair that involves
+    at least one proposed screening, in O((n + k) log n) for k overlaps
+    instead of comparing all pairs."""
+    overlaps = []
+    running = []
+
+    for order, screening in enumerate(sorted(screenings, key=lambda screening: (screening.start, screening.end))):
+        while running and running[0][0] <= screening.start:
+            heapq.heappop(running)
+
+        for _, _, other in running:
+            if screening.index is not None or other.index is not None:
+                overlaps.append((other, screening))
+
+        heapq.heappush(running, (screening.end, order, screening))
+
+    return overlaps
+
+
+def check_schedule(proposals):
+    """proposals is a list of (film_id, start). Returns (overlapping pairs,
+    unknown film ids) using three queries: the films' durations, the longest
+    duration, and one range scan of the schedule around the proposals."""
+    durations = Film.get_durations({film_id for film_id, _ in proposals})
+    unknown = sorted({film_id for film_id, _ in proposals if film_id not in durations})
+    if unknown or not proposals:
+        return [], unknown
+
+    proposed = [Screening(start, start + timedelta(minutes=durations[film_id]), film_id, index=index)
+                for index, (film_id, start) in enumerate(proposals)]
+
+    # an existing screening can only overlap if it starts less than the
+    # longest film before the first proposal
+    window_start = min(screening.start for screening in proposed) - timedelta(minutes=Film.get_max_duration())
+    window_end = max(screening.end for screening in proposed)
+    existing = [Screening(date, date + timedelta(minutes=duration), film_id, schedule_id=schedule_id)
+                for schedule_id, film_id, date, duration in Schedule.get_starting_between(window_start, window_end)]
+
+    return find_overlaps(proposed + existing), unknown
@@ -0,0 +1,53 @@
+from alembic.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from flask_migrate import upgrade
+
+from src.app import db, MIGRATIONS_DIR
+
+
+class SchemaMismatchError(RuntimeError):
+    pass
+
+
+def get_head_revisions():
+    return set(ScriptDirectory(MIGRATIONS_DIR).get_heads())
+
+
+def get_current_revisions():
+    with db.engine.connect() as connection:
+        return set(MigrationContext.configure(connection).get_current_heads())
+
+
+def verify_schema():
+    head = get_head_revisions()
+    current = get_current_revisions()
+
+    if current != head:
+        raise SchemaMismatchError(
+            'Database schema is at revision(s) {} but migrations head is {}. '
+            'Run "flask --app src.app:app db upgrade" before starting the service.'.format(
+                sorted(current) or 'none', sorted(head)))
+
+
+def bootstrap_schema(app):
+    """Runs once at startup, depending on SCHEMA_BOOTSTRAP:
+
+    verify  - fail fast unless the database is at the alembic head (default)
+    upgrade - apply pending migrations, then verify
+    create  - db.create_all(), for throwaway local databases
+    skip    - do nothing
+    """
+    mode = app.config['SCHEMA_BOOTSTRAP']
+
+    if mode == 'skip':
+        return
+
+    with app.app_context():
+        if mode == 'create':
+            db.create_all()
+            return
+
+        if mode == 'upgrade':
+            upgrade(directory=MIGRATIONS_DIR)
+
+        verify_schema()
@@ -0,0 +1,92 @@
+from datetime import date, datetime
+from functools import lru_cache
+from sqlalchemy import Date, DateTime
+from werkzeug.http import http_date
+
+WEEKDAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+MONTHS = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+
+
+def format_http_date(value, time='00:00:00'):
+    """werkzeug's http_date() for a date or a naive datetime, without its
+    round trip through email.utils."""
+    return '{}, {:02d} {} {:04d} {} GMT'.format(WEEKDAYS[value.weekday()], value.day, MONTHS[value.month - 1],
+                                                 value.year, time)
+
+
+# a film list holds few distinct days
+_format_day = lru_cache(maxsize=16384)(format_http_date)
+
+
+def convert_date(value):
+    """Dates as Flask's JSON provider writes them, e.g.
+    'Thu, 01 Dec 2022 00:00:00 GMT'; anything else is left alone, as Flask
+    does."""
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            return http_date(value)
+        return format_http_date(value, '{:02d}:{:02d}:{:02d}'.format(value.hour, value.minute, value.second))
+    if isinstance(value, date):
+        return _format_day(value)
+    return value
+
+
+def get_converter(column):
+    """Function turning a value of the column into a JSON native one, or None
+    when the value can be written as is. StrEnum values are str already."""
+    if isinstance(column.type, (Date, DateTime)):
+        return convert_date
+    return None
+
+
+def _build(columns, read, namespace):
+    items = []
+    for index, column in enumerate(columns):
+        value = read(index, column.key)
+        converter = get_converter(column)
+        if converter is not None:
+            namespace['convert_{}'.format(index)] = converter
+            value = 'convert_{}({})'.format(index, value)
+        items.append('{!r}: {}'.format(column.key, value))
+    return '{' + ', '.join(items) + '}'
+
+
+def _read_attribute(index, key):
+    return 'obj.{}'.format(key) if key.isidentifier() else 'getattr(obj, {!r})'.format(key)
+
+
+def compile_serializer(columns, access='attribute'):
+    """Builds a function returning {column name: JSON native value}, with the
+    conversions picked once from the column types instead of per value.
+
+    access is how values are read:
+    'attribute' - obj.<key>, for ORM objects and result rows;
+    'index'     - obj[0], obj[1], ... for plain tuples and rows;
+    'instance'  - the loaded values in the __dict__ of an ORM object, which
+                  skips the instrumented attributes; falls back to 'attribute'
+                  when one is expired or was never set.
+    """
+    if access not in ('attribute', 'index', 'instance'):
+        raise ValueError('access should be one of: attribute, index, instance.')
+
+    namespace = {}
+    if access == 'index':
+        body = 'return ' + _build(columns, lambda index, key: 'obj[{}]'.format(index), namespace)
+    else:
+        body = 'return ' + _build(columns, _read_attribute, namespace)
+    source = 'def serialize_attributes(obj):\n    {}\n'.format(body)
+
+    if access == 'instance':
+        body = _build(columns, lambda index, key: 'values[{!r}]'.format(key), namespace)
+        source += ('\ndef serialize(obj):\n'
+                   '    values = obj.__dict__\n'
+                   '    try:\n'
+                   '        return {}\n'
+                   '    except KeyError:\n'
+                   '        return serialize_attributes(obj)\n').format(body)
+    else:
+        source += '\nserialize = serialize_attributes\n'
+
+    exec(compile(source, '<serializer {}>'.format(', '.join(column.key for column in columns)), 'exec'),
+         namespace)
+    return namespace['serialize']
@@ -0,0 +1,126 @@
+from threading import Lock, Thread
+from time import sleep
+from itsdangerous import URLSafeTimedSerializer, BadSignature
+from sqlalchemy import select
+from src.app import app, db, token_auth
+from src.model.user import Principal, User, get_user_roles
+from src.request_context import log_exception
+
+
+class TokenGenerations:
+    """Snapshot of user.token_generation, the counter embedded in every
+    issued token. Revoking bumps the column in the same UPDATE, so tokens are
+    checked without a database lookup and revocations survive restarts.
+
+    The snapshot is loaded at startup and reloaded every AUTH_TOKEN_REFRESH
+    seconds, so a revocation made by another process (waitress or ASGI) is
+    seen within that interval; the process making it sees it at once through
+    set(). Users missing from the snapshot were deleted, unless their id is
+    above the highest one ever loaded: those are looked up once in the
+    database, as they may have been created since or deleted before the
+    process started.
+    """
+
+    def __init__(self):
+        self._generations = {}
+        # None until the first load: every unknown user is at generation 0;
+        # never lowered, deleting the newest user must not revive its id
+        self._max_id = None
+        # set() calls since the current load started, which it may not see
+        self._changes = {}
+        self._lock = Lock()
+        self._thread = None
+
+    def get(self, user_id):
+        """The user's current generation, or None for a deleted user."""
+        generations = self._generations
+        if user_id in generations:
+            return generations[user_id]
+        if self._max_id is None:
+            return 0
+        if user_id <= self._max_id:
+            return None
+        return self._lookup(user_id)
+
+    def _lookup(self, user_id):
+        with db.engine.connect() as connection:
+            generation = connection.execute(
+                select(User.token_generation).where(User.id == user_id)).scalar()
+
+        with self._lock:
+            # a set() made while reading is newer than what was read
+            return self._generations.setdefault(user_id, generation)
+
+    def set(self, user_id, generation):
+        """Records a committed change; generation None for a deleted user."""
+        with self._lock:
+            self._generations[user_id] = generation
+            self._changes[user_id] = generation
+
+    def load(self):
+        """Reads the column of every user on a connection of its own."""
+        with self._lock:
+            self._changes = {}
+        with db.engine.connect() as connection:
+            generations = dict(connection.execute(select(User.id, User.token_generation)).all())
+
+        with self._lock:
+            max_id = max(generations, default=0)
+            generations.update(self._changes)
+            self._generations = generations
+            self._max_id = max(max_id, self._max_id or 0)
+
+    def start_refresh(self, interval):
+        """Reloads every interval seconds in a daemon thread; 0 never does."""
+        if interval <= 0 or self._thread is not None:
+            return
+
+        self._thread = Thread(target=self._refresh, args=(interval,), name='token-generations', daemon=True)
+        self._thread.start()
+
+    def _refresh(self, interval):
+        while True:
+            sleep(interval)
+            try:
+                with app.app_context():
+                    self.load()
+            except Exception as e:
+                # the previous snapshot stays in use until the database is back
+                log_exception(e)
+
+
+token_generations = TokenGenerations()
+serializer = URLSafeTimedSerializer(app.config['SECRET_KEY'], salt='auth-token')
+
+
+def issue_token(principal: Principal):
+    return serializer.dumps([principal.id, principal.username, list(principal.roles),
+                             principal.token_generation])
+
+
+def load_token(token: str):
+    try:
+        user_id, username, roles, generation = serializer.loads(
+            token, max_age=app.config['AUTH_TOKEN_TTL'])
+    except (BadSignature, ValueError):
+        return None
+
+    if generation != token_generations.get(user_id):
+        return None
+
+    return Principal(user_id, username, tuple(roles), generation)
+
+
+def revoke_tokens(user_id, generation=None):
+    """Makes this process reject the tokens of a user whose bumped
+    token_generation was just committed, or who was deleted (generation None),
+    without waiting for the next refresh."""
+    token_generations.set(user_id, generation)
+
+
+@token_auth.verify_token
+def verify_token(token):
+    return load_token(token)
+
+
+token_auth.get_user_roles(get_user_roles)
@@ -1,8 +1,30 @@
-from src.app import db, auth
-from passlib.hash import pbkdf2_sha256 as sha256
+from threading import Lock
+from time import perf_counter
+from types import MappingProxyType
+from typing import NamedTuple
+from src.app import app, db, basic_auth
+from src.model.hashing import hashing_executor, hash_password, verify_password
+from sqlalchemy.exc import IntegrityError
+from src.cache import CredentialCache
+from src.model.serializers import compile_serializer
+from src.metrics import password_verify_duration
 from src.error_handler.exception_wrapper import handle_error_format
 from src.error_handler.exception_wrapper import handle_server_exception
 
+credential_cache = CredentialCache(app.config['AUTH_CACHE_SIZE'], app.config['AUTH_CACHE_TTL'])
+
+
+class Principal(NamedTuple):
+    """The authenticated user of the current request, as returned by
+    auth.current_user()."""
+    id: int
+    username: str
+    roles: tuple
+    token_generation: int = 0
+
+    @classmethod
+    def from_user(cls, user, role_ids):
+        return cls(user.id, user.username, role_registry.names(role_ids), user.token_generation)
 
 
 class User(db.Model):
@@ -11,45 +33,125 @@ class User(db.Model):
     email = db.Column(db.String(120), unique=True, nullable=False)
     password = db.Column(db.String(120), nullable=False)
     roles = db.relationship('Role', secondary='users_roles', backref=db.backref('user', lazy='dynamic'))
+    # bumped on every UPDATE, used for ETags and If-Match
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
 
-    def to_json(self):
+    # carried by every issued token; bumping it revokes them, see src.model.token
+    token_generation = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    __mapper_args__ = {'version_id_col': version}
+
+    def to_json(self, role_names=None):
         return {
             'id': self.id,
             'username': self.username,
             'email': self.email,
             'password': self.password,
-            'roles': [role.name for role in self.roles]
+            'roles': [role.name for role in self.roles] if role_names is None else list(role_names)
         }
 
     def save_to_db(self):
         db.session.add(self)
         db.session.commit()
 
+    def bump_token_generation(self):
+        """Written by the next commit, which then revokes the user's tokens."""
+        self.token_generation = (self.token_generation or 0) + 1
+
+    def save_with_role_ids(self, role_ids):
+        db.session.add(self)
+        db.session.flush()
+        db.session.add_all([UsersRoles(user_id=self.id, role_id=role_id) for role_id in role_ids])
+        db.session.commit()
+
+    @classmethod
+    def get_existing(cls, usernames, emails):
+        """Which of the given usernames and emails are taken, in one query."""
+        if not usernames and not emails:
+            return set(), set()
+
+        rows = db.session.query(cls.username, cls.email) \
+            .filter(cls.username.in_(usernames) | cls.email.in_(emails)) \
+            .all()
+
+        return {username for username, _ in rows}, {email for _, email in rows}
+
+    @classmethod
+    def insert_many(cls, rows, role_id):
+        """Inserts users and their users_roles rows with two executemany
+        INSERTs and one commit."""
+        db.session.execute(cls.__table__.insert(), rows)
+        ids = db.session.query(cls.id) \
+            .filter(cls.username.in_([row['username'] for row in rows])) \
+            .all()
+        db.session.execute(UsersRoles.__table__.insert(),
+                           [{'user_id': user_id, 'role_id': role_id} for user_id, in ids])
+        db.session.commit()
+
+    @classmethod
+    def insert_one(cls, row, role_id):
+        """Inserts a user inside a savepoint, so a unique violation only loses
+        that row. The caller commits."""
+        try:
+            with db.session.begin_nested():
+                user_id = db.session.execute(cls.__table__.insert().values(**row)).inserted_primary_key[0]
+                db.session.execute(UsersRoles.__table__.insert().values(user_id=user_id, role_id=role_id))
+            return True
+        except IntegrityError:
+            return False
+
+    @classmethod
+    def get_page(cls, after_id=None, limit=50):
+        query = cls.query
+        if after_id is not None:
+            query = query.filter(cls.id > after_id)
+
+        return query.order_by(cls.id).limit(limit).all()
+
     @classmethod
-    def return_all(cls):
-        def to_json(user):
-            return {
-                'id': user.id,
-                'username': user.username,
-                'email': user.email,
-                'password': user.password,
-                'playlists': user.playlists
-            }
-
-        return {'users': [to_json(user) for user in User.query.all()]}
+    def get_role_ids(cls, user_ids):
+        """Role ids of many users in one query, as {user_id: [role_id, ...]}."""
+        role_ids = {user_id: [] for user_id in user_ids}
+        if not user_ids:
+            return role_ids
+
+        rows = db.session.query(UsersRoles.user_id, UsersRoles.role_id) \
+            .filter(UsersRoles.user_id.in_(user_ids)) \
+            .order_by(UsersRoles.id) \
+            .all()
+        for user_id, role_id in rows:
+            role_ids[user_id].append(role_id)
+
+        return role_ids
 
     @staticmethod
     def generate_hash(password):
-        return sha256.hash(password)
+        return hashing_executor.run(hash_password, password)
 
     @staticmethod
     def verify_hash(password, hash_):
-        return sha256.verify(password, hash_)
+        started = perf_counter()
+        try:
+            return hashing_executor.run(verify_password, password, hash_)
+        finally:
+            password_verify_duration.observe(perf_counter() - started)
 
     @classmethod
     def get_by_username(cls, username):
         return User.query.filter_by(username=username).first()
 
+    @classmethod
+    def get_with_role_ids(cls, username):
+        rows = db.session.query(User, UsersRoles.role_id) \
+            .outerjoin(UsersRoles, UsersRoles.user_id == User.id) \
+            .filter(User.username == username) \
+            .all()
+
+        if not rows:
+            return None, ()
+
+        return rows[0][0], tuple(role_id for _, role_id in rows if role_id is not None)
+
     @classmethod
     def get_by_email(cls, email):
         return User.query.filter_by(email=email).first()
@@ -71,17 +173,23 @@ class User(db.Model):
             return handle_error_format('User with such id does not exist.',
                                        'Field \'userId\' in path parameters.'), 404
 
-@auth.verify_password
+@basic_auth.verify_password
 def verify_hash(username, password):
-    user = User.get_by_username(username)
-    if user and User.verify_hash(password, user.password):
-        return username
+    user, role_ids = User.get_with_role_ids(username)
+    if not user:
+        return
+
+    if credential_cache.check(username, password, user.password):
+        return Principal.from_user(user, role_ids)
 
+    if User.verify_hash(password, user.password):
+        credential_cache.remember(username, password, user.password)
+        return Principal.from_user(user, role_ids)
 
-@auth.get_user_roles
-def get_user_roles(user):
-    user_entity = User.get_by_username(user)
-    return [role.name for role in user_entity.roles]
+
+@basic_auth.get_user_roles
+def get_user_roles(principal):
+    return principal.roles
 
 
 class Role(db.Model):
@@ -97,6 +205,7 @@ class Role(db.Model):
     def save_to_db(self):
         db.session.add(self)
         db.session.commit()
+        role_registry.invalidate()
 
     @classmethod
     def get_by_name(cls, name):
@@ -112,3 +221,58 @@ class UsersRoles(db.Model):
     user_id = db.Column(db.Integer(), db.ForeignKey('user.id', ondelete='CASCADE'))
     role_id = db.Column(db.Integer(), db.ForeignKey('role.id', ondelete='CASCADE'))
 
+
+class RoleRegistry:
+    """In-process snapshot of the role table (name <-> id).
+
+    Roles are loaded once at startup and are read without locking; a refresh
+    builds a new immutable snapshot and swaps it in. invalidate() makes the
+    next lookup reload the table.
+    """
+
+    def __init__(self):
+        self._snapshot = None
+        self._lock = Lock()
+
+    def load(self):
+        roles = db.session.query(Role.id, Role.name).all()
+        snapshot = (MappingProxyType({name: role_id for role_id, name in roles}),
+                    MappingProxyType({role_id: name for role_id, name in roles}))
+        with self._lock:
+            self._snapshot = snapshot
+        return snapshot
+
+    refresh = load
+
+    def invalidate(self):
+        with self._lock:
+            self._snapshot = None
+
+    def _get_snapshot(self):
+        snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = self.load()
+        return snapshot
+
+    def id_of(self, name):
+        by_name = self._get_snapshot()[0]
+        if name not in by_name:
+            by_name = self.load()[0]
+        return by_name[name]
+
+    def names(self, role_ids):
+        if not role_ids:
+            return ()
+
+        by_id = self._get_snapshot()[1]
+        if any(role_id not in by_id for role_id in role_ids):
+            by_id = self.load()[1]
+        return tuple(by_id[role_id] for role_id in role_ids if role_id in by_id)
+
+
+role_registry = RoleRegistry()
+
+# to_json() without the roles, which the caller adds from role_registry
+serialize_user = compile_serializer([User.id, User.username, User.email, User.password], access='instance')
+# the same without the password hash, for GET /users
+serialize_listed_user = compile_serializer([User.id, User.username, User.email], access='instance')
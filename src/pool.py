@@ -0,0 +1,74 @@
+from bisect import bisect_left
+from threading import Lock
+from time import perf_counter
+
+from sqlalchemy.exc import TimeoutError
+from sqlalchemy.pool import QueuePool
+
+# upper bounds in seconds, the last bucket takes everything slower
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+class WaitHistogram:
+    """Counts of pool checkout waits per bucket, plus their sum."""
+
+    def __init__(self, buckets=WAIT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._lock = Lock()
+
+    def observe(self, seconds):
+        with self._lock:
+            self._counts[bisect_left(self.buckets, seconds)] += 1
+            self._sum += seconds
+
+    def to_json(self):
+        """Cumulative counts keyed by upper bound, as Prometheus does."""
+        with self._lock:
+            counts, total = list(self._counts), self._sum
+
+        buckets, cumulative = {}, 0
+        for bound, count in zip(self.buckets + ('+Inf',), counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        return {'buckets': buckets, 'count': cumulative, 'sum': round(total, 6)}
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that times every checkout, including the wait for a free
+    connection and the connect of a new one, and counts checkout timeouts."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_histogram = WaitHistogram()
+        self.timeouts = 0
+
+    def _do_get(self):
+        start = perf_counter()
+        try:
+            return super()._do_get()
+        except TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            self.wait_histogram.observe(perf_counter() - start)
+
+    def recreate(self):
+        # engine.dispose() swaps in a new pool, keep the counters running
+        pool = super().recreate()
+        pool.wait_histogram = self.wait_histogram
+        pool.timeouts = self.timeouts
+        return pool
+
+    def stats(self):
+        return {
+            'size': self.size(),
+            'checked_in': self.checkedin(),
+            'checked_out': self.checkedout(),
+            'overflow': max(self.overflow(), 0),
+            'max_overflow': self._max_overflow,
+            'timeout': self._timeout,
+            'timeouts': self.timeouts,
+            'wait_seconds': self.wait_histogram.to_json()
+        }
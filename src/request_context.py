@@ -0,0 +1,117 @@
+import json
+import logging
+import re
+from contextvars import ContextVar
+from itertools import count
+from secrets import token_hex
+from threading import Lock
+from time import monotonic
+
+from flask import g, request
+
+REQUEST_ID_HEADER = 'X-Request-ID'
+# what we accept from a proxy or client, anything else gets a new id
+VALID_REQUEST_ID = re.compile(r'[A-Za-z0-9._:-]{1,128}')
+
+logger = logging.getLogger('src.error')
+
+# ids are this process' prefix plus a counter: no lock, clock or MAC lookup
+_prefix = token_hex(4)
+_counter = count(1)
+_request_id = ContextVar('request_id', default=None)
+
+
+def new_request_id():
+    return '{}-{:x}'.format(_prefix, next(_counter))
+
+
+def current_request_id():
+    """The id of the current request, or a new one outside of requests."""
+    request_id = _request_id.get()
+    return request_id if request_id is not None else new_request_id()
+
+
+class TracebackSampler:
+    """Lets through at most limit full tracebacks every interval seconds, so
+    an error storm is logged one line per error instead of formatting every
+    stack. Counts what it held back for the next traceback that gets through."""
+
+    def __init__(self, limit=10, interval=1.0, timer=monotonic):
+        self.limit = limit
+        self.interval = interval
+        self.timer = timer
+        self._window_started = None
+        self._taken = 0
+        self._suppressed = 0
+        self._lock = Lock()
+
+    def sample(self):
+        """(True, tracebacks suppressed since the last one) or (False, 0)."""
+        now = self.timer()
+        with self._lock:
+            if self._window_started is None or now - self._window_started >= self.interval:
+                self._window_started = now
+                self._taken = 0
+            if self._taken >= self.limit:
+                self._suppressed += 1
+                return False, 0
+            self._taken += 1
+            suppressed, self._suppressed = self._suppressed, 0
+            return True, suppressed
+
+
+traceback_sampler = TracebackSampler()
+
+
+def log_exception(error):
+    """One JSON ERROR line on the 'src.error' logger with the request id, with
+    the traceback when traceback_sampler lets it through."""
+    if not logger.isEnabledFor(logging.ERROR):
+        return
+
+    with_traceback, suppressed = traceback_sampler.sample()
+    record = {'request_id': current_request_id(), 'error': type(error).__name__, 'message': str(error)}
+    if suppressed:
+        record['tracebacks_suppressed'] = suppressed
+    logger.error(json.dumps(record), exc_info=error if with_traceback else None)
+
+
+def bind_request_id(incoming=None):
+    """Makes incoming, when valid, or a new id the current one; returns the
+    token for unbind_request_id()."""
+    request_id = incoming if incoming and VALID_REQUEST_ID.fullmatch(incoming) else new_request_id()
+    return _request_id.set(request_id)
+
+
+def unbind_request_id(token):
+    _request_id.reset(token)
+
+
+def start_request():
+    g.request_id_token = bind_request_id(request.headers.get(REQUEST_ID_HEADER))
+
+
+def finish_request(response):
+    request_id = _request_id.get()
+    if request_id is not None:
+        response.headers[REQUEST_ID_HEADER] = request_id
+    return response
+
+
+def end_request(exception):
+    token = g.pop('request_id_token', None)
+    if token is not None:
+        unbind_request_id(token)
+
+
+def install_request_context(app):
+    """Gives every request an id, taken from a valid incoming X-Request-ID or
+    generated, and sends it back in the same header. Error payloads and log
+    lines carry it. Tracebacks are sampled with TRACEBACK_SAMPLE_LIMIT per
+    TRACEBACK_SAMPLE_INTERVAL seconds."""
+    traceback_sampler.limit = app.config['TRACEBACK_SAMPLE_LIMIT']
+    traceback_sampler.interval = app.config['TRACEBACK_SAMPLE_INTERVAL']
+
+    app.before_request(start_request)
+    app.after_request(finish_request)
+    app.teardown_request(end_request)
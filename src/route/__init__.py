@@ -1,11 +1,29 @@
 from src.route.users import create_user
+from src.route.users import login
 from src.route.users import get_user_by_id
 from src.route.users import get_user_by_username
 from src.route.users import update_user_by_id
 from src.route.users import delete_user_by_id
+from src.route.users import get_users
+from src.route.users import provision_users
 
 from src.route.films import create_film
 from src.route.films import delete_film_by_id
 from src.route.films import get_film_by_id
 from src.route.films import update_film_by_id
+from src.route.films import get_films
+from src.route.films import import_films
 
+
+from src.route.exports import export_films
+from src.route.exports import export_users
+from src.route.exports import export_schedule
+
+from src.route.admin import get_hashing_stats
+from src.route.admin import get_cache_stats
+from src.route.admin import get_pool_stats
+from src.route.admin import get_metrics
+
+from src.route.schedule import get_schedule
+from src.route.schedule import get_film_schedule
+from src.route.schedule import check_screenings
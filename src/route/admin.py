@@ -0,0 +1,37 @@
+from flask import Response
+from src.app import app, auth, db
+from src.metrics import render_metrics
+from src.model.film import film_cache
+from src.model.hashing import hashing_executor
+from src.error_handler.exception_wrapper import handle_server_exception
+
+
+@app.route('/admin/hashing', methods=['GET'])
+@auth.login_required(role='admin')
+@handle_server_exception
+def get_hashing_stats():
+    return hashing_executor.stats()
+
+
+@app.route('/admin/caches', methods=['GET'])
+@auth.login_required(role='admin')
+@handle_server_exception
+def get_cache_stats():
+    return {'films': film_cache.stats()}
+
+
+@app.route('/admin/pool', methods=['GET'])
+@auth.login_required(role='admin')
+@handle_server_exception
+def get_pool_stats():
+    pool = db.engine.pool
+    if not hasattr(pool, 'stats'):
+        return {'pool': type(pool).__name__, 'status': pool.status()}
+    return pool.stats()
+
+
+@app.route('/metrics', methods=['GET'])
+@auth.login_required(role='admin')
+@handle_server_exception
+def get_metrics():
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,41 @@
+import json
+from itertools import islice
+
+
+def read_ndjson(stream):
+    """Yields one parsed object per non-empty line, or None for a line that is
+    not valid JSON, without reading the whole body first."""
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None
+
+
+def batches(rows, batch_size):
+    """Yields lists of (index, row) pairs of at most batch_size items."""
+    rows = enumerate(rows)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def row_error(index, status, message, field):
+    return {
+        'index': index,
+        'status': status,
+        'message': message,
+        'source': 'Field \'{}\' in row {}.'.format(field, index)
+    }
+
+
+def summarize(results):
+    results = sorted(results, key=lambda result: result['index'])
+    created = sum(1 for result in results if result['status'] == 'created')
+
+    return {'created': created, 'failed': len(results) - created, 'results': results}
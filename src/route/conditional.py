@@ -0,0 +1,39 @@
+from flask import request, Response
+from werkzeug.http import quote_etag
+
+from src.error_handler.exception_wrapper import handle_error_format
+
+
+def make_etag(entity_id, version):
+    """Strong entity tag of one row version, unquoted."""
+    return '{}-{}'.format(entity_id, version)
+
+
+def etag_header(etag):
+    return {'ETag': quote_etag(etag)}
+
+
+def is_not_modified(etag):
+    """True when If-None-Match already names etag, so the body can be skipped."""
+    return request.if_none_match.contains_weak(etag)
+
+
+def not_modified(etag):
+    return Response(status=304, headers=etag_header(etag))
+
+
+def check_if_match(etag):
+    """412 response when the request has an If-Match that does not name etag,
+    otherwise None."""
+    if request.if_match and not request.if_match.contains(etag):
+        return precondition_failed()
+
+
+def precondition_failed():
+    return handle_error_format('Resource was modified since it was fetched.',
+                               'Header \'If-Match\'.'), 412
+
+
+def modified_concurrently():
+    return handle_error_format('Resource was modified by another request, fetch it and retry.',
+                               'Request body.'), 409
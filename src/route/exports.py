@@ -0,0 +1,77 @@
+import csv
+from io import StringIO
+from flask import Response, stream_with_context
+from sqlalchemy import select
+from src.app import app, auth, db
+from src.model import Film, User
+from src.model.film import Schedule
+from src.model.serializers import compile_serializer
+from src.error_handler.exception_wrapper import handle_server_exception
+from src.route.pagination import QueryArgumentError, get_choice_arg
+
+EXPORT_BATCH_SIZE = 1000
+EXPORT_FORMATS = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+
+
+def ndjson_chunks(columns, partitions):
+    serialize = compile_serializer(columns, access='index')
+    for rows in partitions:
+        yield ''.join(app.json.dumps(serialize(row), sort_keys=False, separators=(',', ':')) + '\n'
+                      for row in rows)
+
+
+def csv_chunks(columns, partitions):
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow([column.name for column in columns])
+    yield buffer.getvalue()
+
+    for rows in partitions:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(rows)
+        yield buffer.getvalue()
+
+
+def export_table(name, columns):
+    """Streams the rows of a table with a server-side cursor, one batch of
+    EXPORT_BATCH_SIZE rows at a time, so memory does not grow with the table."""
+    try:
+        export_format = get_choice_arg('format', list(EXPORT_FORMATS)) or 'ndjson'
+    except QueryArgumentError as e:
+        return e.to_response()
+
+    def generate():
+        result = db.session.execute(
+            select(*columns).order_by(columns[0]).execution_options(stream_results=True))
+        partitions = result.yield_per(EXPORT_BATCH_SIZE).partitions()
+
+        chunks = csv_chunks if export_format == 'csv' else ndjson_chunks
+        yield from chunks(columns, partitions)
+
+    return Response(stream_with_context(generate()), mimetype=EXPORT_FORMATS[export_format], headers={
+        'Content-Disposition': 'attachment; filename={}.{}'.format(name, export_format)
+    })
+
+
+@app.route('/export/films', methods=['GET'])
+@auth.login_required(role='admin')
+@handle_server_exception
+def export_films():
+    return export_table('films', list(Film.__table__.columns))
+
+
+@app.route('/export/users', methods=['GET'])
+@auth.login_required(role='admin')
+@handle_server_exception
+def export_users():
+    # password hashes are left out of reporting dumps
+    return export_table('users', [User.id, User.username, User.email])
+
+
+@app.route('/export/schedule', methods=['GET'])
+@auth.login_required(role='admin')
+@handle_server_exception
+def export_schedule():
+    return export_table('schedule', list(Schedule.__table__.columns))
@@ -1,28 +1,39 @@
-from src.app import app, auth
+from datetime import date
+from flask import request
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
+from src.app import app, auth, db
 from src.model import State, Film
+from src.model.film import parse_duration, serialize_film
+from src.model.constraints import get_unique_violation
 from src.model import User
-from flask_restful import reqparse
 from src.error_handler.exception_wrapper import handle_error_format
 from src.error_handler.exception_wrapper import handle_server_exception
+from src.route.pagination import QueryArgumentError, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, get_page_args, \
+    get_choice_arg, get_date_arg, get_int_arg, make_page
+from src.route.schemas import BodyFieldError, Field, Schema, text, iso_date, choice
+from src.route.bulk import read_ndjson, batches, row_error, summarize
+from src.route.conditional import make_etag, etag_header, is_not_modified, not_modified, check_if_match, \
+    precondition_failed, modified_concurrently
+
+MAX_BULK_BATCH_SIZE = 10000
+
+FILM_SCHEMA = Schema(
+    Field('name', text('name', 45)),
+    Field('duration', parse_duration),
+    Field('state', choice('state', State), default=State.Done),
+    Field('created_at', iso_date('created_at')),
+)
 
 
 @app.route('/film/<userId>', methods=['POST'])
 @auth.login_required(role='admin')
 @handle_server_exception
 def create_film(userId: int):
-    parser = reqparse.RequestParser()
-
-    parser.add_argument('name', help='name cannot be blank', required=True)
-    parser.add_argument('duration', help='duration cannot be blank', required=True)
-    parser.add_argument('state', help='state cannot be blank', default=State.Done)
-    parser.add_argument('created_at', help='creation date cannot be blank', required=True)
-
-    data = parser.parse_args()
-    name = data['name']
-    #state = State(data['state'])
-    state = data['state']
-    duration = data['duration']
-    created_at = data['created_at']
+    try:
+        data = FILM_SCHEMA.parse()
+    except BodyFieldError as e:
+        return e.to_response()
 
     user = User.get_by_id(userId)
 
@@ -31,21 +42,32 @@ def create_film(userId: int):
                                    'Field \'userId\' in path parameters.'), 404
 
     film = Film(
-        name=name,
+        name=data['name'],
         # userId=userId,
-        duration=duration,
-        state=state,
-        created_at=created_at
+        duration=data['duration'],
+        state=data['state'],
+        created_at=data['created_at']
     )
 
     try:
         film.save_to_db()
 
         return {'message': 'Film was successfully created'}, 200
+    except IntegrityError as e:
+        db.session.rollback()
+        return duplicate_film_response(e)
     except:
         return {'message': 'Something went wrong'}, 500
 
 
+def duplicate_film_response(error):
+    """400 for a write rejected by the unique key on film.name."""
+    if get_unique_violation(error) != 'name':
+        raise error
+    return handle_error_format('Film with such name already exists.',
+                               'Field \'name\' in the request body.'), 400
+
+
 @app.route('/film/<filmId>', methods=['DELETE'])
 @auth.login_required(role='admin')
 @handle_server_exception
@@ -57,31 +79,28 @@ def delete_film_by_id(filmId: int):
 @auth.login_required(role='user')
 @handle_server_exception
 def get_film_by_id(filmId: int):
-    film = Film.get_by_id(filmId)
+    cached = Film.get_cached(filmId)
 
-    if not film:
+    if not cached:
         return handle_error_format('Film with such id does not exist.',
                                    'Field \'filmId\' in path parameters.'), 404
 
-    return Film.to_json(film)
+    version, film_json = cached
+    etag = make_etag(film_json['id'], version)
+    if is_not_modified(etag):
+        return not_modified(etag)
+
+    return dict(film_json), 200, etag_header(etag)
 
 
 @app.route('/film/<filmId>', methods=['PUT'])
 @auth.login_required(role='admin')
 @handle_server_exception
 def update_film_by_id(filmId: int):
-    parser = reqparse.RequestParser()
-
-    parser.add_argument('name', help='name cannot be blank', required=True)
-    parser.add_argument('duration', help='duration cannot be blank', required=True)
-    parser.add_argument('state', help='state cannot be blank', default=State.Done)
-    parser.add_argument('created_at', help='creation date cannot be blank', required=True)
-
-    data = parser.parse_args()
-    name = data['name']
-    state = data['state']
-    duration = data['duration']
-    created_at = data['created_at']
+    try:
+        data = FILM_SCHEMA.parse()
+    except BodyFieldError as e:
+        return e.to_response()
 
     film = Film.get_by_id(filmId)
 
@@ -89,14 +108,132 @@ def update_film_by_id(filmId: int):
         return handle_error_format('Film with such id does not exist.',
                                    'Field \'filmId\' in path parameters.'), 404
 
-    if Film.get_by_name(name):
-        return handle_error_format('Film with such name already exists.',
-                                   'Field \'name\' in the request body.'), 400
+    precondition = check_if_match(make_etag(film.id, film.version))
+    if precondition:
+        return precondition
 
-    film.name = name
-    film.state = state
-    film.duration = duration
-    film.created_at = created_at
-    film.save_to_db()
+    film.name = data['name']
+    film.state = data['state']
+    film.duration = data['duration']
+    film.created_at = data['created_at']
+    try:
+        film.save_to_db()
+    except IntegrityError as e:
+        db.session.rollback()
+        return duplicate_film_response(e)
+    except StaleDataError:
+        db.session.rollback()
+        return precondition_failed() if request.if_match else modified_concurrently()
+
+    return Film.to_json(film), 200, etag_header(make_etag(film.id, film.version))
+
+
+@app.route('/films', methods=['GET'])
+@auth.login_required(role='user')
+@handle_server_exception
+def get_films():
+    try:
+        state = get_choice_arg('state', [state.value for state in State])
+        created_from = get_date_arg('created_from')
+        created_to = get_date_arg('created_to')
+        by_created_at = created_from is not None or created_to is not None
+        if by_created_at:
+            after = get_created_at_cursor()
+            limit = get_int_arg('limit', DEFAULT_PAGE_SIZE, minimum=1, maximum=MAX_PAGE_SIZE)
+        else:
+            after, limit = get_page_args()
+    except QueryArgumentError as e:
+        return e.to_response()
+
+    films = Film.get_page(after, limit + 1, state, created_from, created_to)
+
+    if by_created_at:
+        return make_page('films', films, limit, serialize_film,
+                         lambda film: '{},{}'.format(film.created_at.isoformat(), film.id))
+    return make_page('films', films, limit, serialize_film, lambda film: film.id)
+
+
+def get_created_at_cursor():
+    """With a created_at filter the cursor is '<created_at>,<id>' of the last
+    film of the previous page."""
+    value = request.args.get('after')
+    if value is None:
+        return None
 
-    return Film.to_json(film)
+    try:
+        after_date, after_id = value.rsplit(',', 1)
+        return date.fromisoformat(after_date), int(after_id)
+    except ValueError:
+        raise QueryArgumentError('after should be a cursor returned as next_cursor.', 'after')
+
+
+def validate_film_row(row):
+    """Returns (values, None) for a valid row, or (None, (message, field)).
+    Applies the same rules as create_film."""
+    return FILM_SCHEMA.validate_row(row)
+
+
+def import_film_rows(rows, batch_size):
+    """Validates and inserts rows batch by batch. Every row gets a result; a
+    bad or conflicting row never aborts the rest of the load."""
+    results = []
+    seen_names = set()
+
+    for batch in batches(rows, batch_size):
+        valid = []
+        for index, row in batch:
+            values, error = validate_film_row(row)
+            if error:
+                results.append(row_error(index, 'invalid', *error))
+            elif values['name'] in seen_names:
+                results.append(row_error(index, 'conflict', 'Film with such name is repeated in the request.', 'name'))
+            else:
+                seen_names.add(values['name'])
+                valid.append((index, values))
+
+        existing = Film.get_existing_names([values['name'] for _, values in valid])
+        inserts = []
+        for index, values in valid:
+            if values['name'] in existing:
+                results.append(row_error(index, 'conflict', 'Film with such name already exists.', 'name'))
+            else:
+                inserts.append((index, values))
+
+        if not inserts:
+            continue
+
+        try:
+            Film.insert_many([values for _, values in inserts])
+            results.extend({'index': index, 'status': 'created'} for index, _ in inserts)
+        except IntegrityError:
+            # a concurrent writer took some of the names, retry row by row
+            db.session.rollback()
+            for index, values in inserts:
+                if Film.insert_one(values):
+                    results.append({'index': index, 'status': 'created'})
+                else:
+                    results.append(row_error(index, 'conflict', 'Film with such name already exists.', 'name'))
+            db.session.commit()
+
+    return results
+
+
+@app.route('/films/bulk', methods=['POST'])
+@auth.login_required(role='admin')
+@handle_server_exception
+def import_films():
+    try:
+        batch_size = get_int_arg('batch_size', app.config['BULK_BATCH_SIZE'],
+                                 minimum=1, maximum=MAX_BULK_BATCH_SIZE)
+    except QueryArgumentError as e:
+        return e.to_response()
+
+    if request.mimetype == 'application/x-ndjson':
+        rows = read_ndjson(request.stream)
+    else:
+        rows = request.get_json(silent=True)
+        if not isinstance(rows, list):
+            return handle_error_format('Request body should be a JSON array or NDJSON.',
+                                       'Request body.'), 400
+
+    return summarize(import_film_rows(rows, batch_size)), 200
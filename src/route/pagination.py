@@ -0,0 +1,93 @@
+from datetime import date, datetime
+from flask import request
+from src.error_handler.exception_wrapper import handle_error_format
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class QueryArgumentError(ValueError):
+
+    def __init__(self, message: str, name: str):
+        super().__init__(message)
+        self.message = message
+        self.name = name
+
+    def to_response(self):
+        return handle_error_format(self.message,
+                                   'Parameter \'{}\' in query string.'.format(self.name)), 400
+
+
+def get_int_arg(name: str, default=None, minimum=None, maximum=None):
+    value = request.args.get(name)
+    if value is None:
+        return default
+
+    try:
+        value = int(value)
+    except ValueError:
+        raise QueryArgumentError('{} should be an integer.'.format(name), name)
+
+    if minimum is not None and value < minimum or maximum is not None and value > maximum:
+        if maximum is None:
+            message = '{} should be at least {}.'.format(name, minimum)
+        elif minimum is None:
+            message = '{} should be at most {}.'.format(name, maximum)
+        else:
+            message = '{} should be between {} and {}.'.format(name, minimum, maximum)
+        raise QueryArgumentError(message, name)
+
+    return value
+
+
+def get_date_arg(name: str):
+    value = request.args.get(name)
+    if value is None:
+        return None
+
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise QueryArgumentError('{} should be a date in YYYY-MM-DD format.'.format(name), name)
+
+
+def get_datetime_arg(name: str, default=None):
+    value = request.args.get(name)
+    if value is None:
+        return default
+
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise QueryArgumentError('{} should be a date and time in YYYY-MM-DDTHH:MM:SS format.'.format(name), name)
+
+
+def get_choice_arg(name: str, choices):
+    value = request.args.get(name)
+    if value is None:
+        return None
+
+    if value not in choices:
+        raise QueryArgumentError('{} should be one of: {}.'.format(name, ', '.join(choices)), name)
+
+    return value
+
+
+def get_page_args():
+    """Returns (after, limit) for keyset pagination: the last id of the previous
+    page and the page size."""
+    after = get_int_arg('after', minimum=0)
+    limit = get_int_arg('limit', DEFAULT_PAGE_SIZE, minimum=1, maximum=MAX_PAGE_SIZE)
+    return after, limit
+
+
+def make_page(key: str, items, limit: int, to_json, cursor_of):
+    """items holds up to limit + 1 rows; the extra one only tells whether there
+    is a next page."""
+    has_more = len(items) > limit
+    items = items[:limit]
+
+    return {
+        key: [to_json(item) for item in items],
+        'next_cursor': cursor_of(items[-1]) if has_more else None
+    }
@@ -0,0 +1,99 @@
+from datetime import datetime
+from flask import request
+from src.app import app, auth
+from src.model.film import Schedule
+from src.model.scheduling import check_schedule
+from src.error_handler.exception_wrapper import handle_error_format
+from src.error_handler.exception_wrapper import handle_server_exception
+from src.route.pagination import QueryArgumentError, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, get_int_arg, \
+    get_datetime_arg, make_page
+
+
+def get_schedule_cursor():
+    """The cursor is '<date>,<id>' of the last screening of the previous page."""
+    value = request.args.get('after')
+    if value is None:
+        return None
+
+    try:
+        after_date, after_id = value.rsplit(',', 1)
+        return datetime.fromisoformat(after_date), int(after_id)
+    except ValueError:
+        raise QueryArgumentError('after should be a cursor returned as next_cursor.', 'after')
+
+
+@app.route('/schedule', methods=['GET'])
+@auth.login_required(role='user')
+@handle_server_exception
+def get_schedule():
+    try:
+        start = get_datetime_arg('from')
+        end = get_datetime_arg('to')
+        if start is None or end is None:
+            raise QueryArgumentError('from and to are required.', 'from' if start is None else 'to')
+        if end <= start:
+            raise QueryArgumentError('to should be later than from.', 'to')
+        after = get_schedule_cursor()
+        limit = get_int_arg('limit', DEFAULT_PAGE_SIZE, minimum=1, maximum=MAX_PAGE_SIZE)
+    except QueryArgumentError as e:
+        return e.to_response()
+
+    screenings = Schedule.get_between(start, end, after, limit + 1)
+
+    return make_page('screenings', screenings, limit, Schedule.row_to_json,
+                     lambda row: '{},{}'.format(row.date.isoformat(), row.id))
+
+
+@app.route('/film/<filmId>/schedule', methods=['GET'])
+@auth.login_required(role='user')
+@handle_server_exception
+def get_film_schedule(filmId: int):
+    try:
+        start = get_datetime_arg('from', datetime.now())
+        limit = get_int_arg('limit', 10, minimum=1, maximum=MAX_PAGE_SIZE)
+    except QueryArgumentError as e:
+        return e.to_response()
+
+    screenings = Schedule.get_next_for_film(filmId, start, limit)
+
+    return {'screenings': [Schedule.row_to_json(row) for row in screenings]}
+
+
+def parse_proposals(rows):
+    """Returns ([(film_id, start), ...], None) or (None, error response)."""
+    if not isinstance(rows, list):
+        return None, (handle_error_format('Request body should be a JSON array of screenings.', 'Request body.'), 400)
+
+    proposals = []
+    for index, row in enumerate(rows):
+        film_id = row.get('film_id') if isinstance(row, dict) else None
+        if not isinstance(film_id, int):
+            return None, (handle_error_format('film_id should be an integer.',
+                                              'Field \'film_id\' in row {}.'.format(index)), 400)
+        try:
+            start = datetime.fromisoformat(row.get('date'))
+        except (TypeError, ValueError):
+            return None, (handle_error_format('date should be a date and time in YYYY-MM-DDTHH:MM:SS format.',
+                                              'Field \'date\' in row {}.'.format(index)), 400)
+        proposals.append((film_id, start))
+
+    return proposals, None
+
+
+@app.route('/schedule/check', methods=['POST'])
+@auth.login_required(role='admin')
+@handle_server_exception
+def check_screenings():
+    proposals, error = parse_proposals(request.get_json(silent=True))
+    if error:
+        return error
+
+    overlaps, unknown = check_schedule(proposals)
+    if unknown:
+        return handle_error_format('Films with ids {} do not exist.'.format(unknown),
+                                   'Field \'film_id\' in the request body.'), 404
+
+    return {
+        'ok': not overlaps,
+        'conflicts': [[first.to_json(), second.to_json()] for first, second in overlaps]
+    }
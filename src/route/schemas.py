@@ -0,0 +1,101 @@
+from datetime import date
+from typing import Any, Callable, NamedTuple
+from flask import request
+from src.error_handler.exception_wrapper import handle_error_format
+
+MISSING = object()
+
+
+class BodyFieldError(ValueError):
+
+    def __init__(self, message: str, name: str):
+        super().__init__(message)
+        self.message = message
+        self.name = name
+
+    def to_response(self):
+        return handle_error_format(self.message,
+                                   'Field \'{}\' in the request body.'.format(self.name)), 400
+
+
+class Field(NamedTuple):
+    """One body field: coerce turns the raw value into the typed one or raises
+    ValueError with the message for the client. A missing, null or empty
+    value takes default when there is one, else goes through coerce too."""
+    name: str
+    coerce: Callable[[Any], Any]
+    default: Any = MISSING
+
+
+def text(name: str, max_length: int):
+    def coerce(value):
+        if not isinstance(value, str) or not value.strip():
+            raise ValueError('{} cannot be blank'.format(name))
+        if len(value) > max_length:
+            raise ValueError('{} should be at most {} characters long.'.format(name, max_length))
+        return value
+
+    return coerce
+
+
+def iso_date(name: str):
+    def coerce(value):
+        try:
+            return date.fromisoformat(value)
+        except (TypeError, ValueError):
+            raise ValueError('{} should be a date in YYYY-MM-DD format.'.format(name))
+
+    return coerce
+
+
+def choice(name: str, enum):
+    message = '{} should be one of: {}.'.format(name, ', '.join(enum.__members__))
+
+    def coerce(value):
+        if not isinstance(value, str) or value not in enum.__members__:
+            raise ValueError(message)
+        return enum(value)
+
+    return coerce
+
+
+class Schema:
+    """Request body validation built once at import time, so a request only
+    runs the coercions of its fields. Errors name the first bad field."""
+
+    def __init__(self, *fields: Field):
+        self.fields = fields
+
+    def validate(self, data: dict) -> dict:
+        values = {}
+        for name, coerce, default in self.fields:
+            value = data.get(name)
+            if default is not MISSING and (value is None or value == ''):
+                values[name] = default
+                continue
+            try:
+                values[name] = coerce(value)
+            except ValueError as e:
+                raise BodyFieldError(str(e), name)
+        return values
+
+    def validate_row(self, row):
+        """Returns (values, None) for a valid bulk row, or (None, (message, field))."""
+        if not isinstance(row, dict):
+            return None, ('Row should be a JSON object.', 'row')
+
+        try:
+            return self.validate(row), None
+        except BodyFieldError as e:
+            return None, (e.message, e.name)
+
+    def parse(self) -> dict:
+        """Typed values of the JSON (or form) body of the current request;
+        raises BodyFieldError."""
+        data = request.get_json(silent=True)
+        if data is None:
+            data = request.form
+        if not isinstance(data, dict):
+            raise BodyFieldError('Request body should be a JSON object.', 'body')
+
+        return self.validate(data)
@@ -1,52 +1,98 @@
-from src.app import app, auth
-from src.model import User, Role
-from flask_restful import reqparse
+import json
+import click
+from flask import request
+from flask.cli import AppGroup
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
+from src.app import app, auth, basic_auth, db
+from src.model import User, issue_token, revoke_tokens
+from src.model.user import credential_cache, role_registry, serialize_listed_user
+from src.model.hashing import HashingExecutor, hash_passwords, hashing_executor
+from src.model.constraints import get_unique_violation
 from src.error_handler.exception_wrapper import handle_error_format
 from src.error_handler.exception_wrapper import handle_server_exception
+from src.route.pagination import QueryArgumentError, get_page_args, get_int_arg, make_page
+from src.route.schemas import BodyFieldError, Field, Schema, text
+from src.route.bulk import read_ndjson, batches, row_error, summarize
+from src.route.conditional import make_etag, etag_header, is_not_modified, not_modified, check_if_match, \
+    precondition_failed, modified_concurrently
 
+MAX_BULK_BATCH_SIZE = 10000
 
-@app.route('/user/create', methods=['POST'])
-#@handle_server_exception
-def create_user():
-    parser = reqparse.RequestParser()
 
-    parser.add_argument('username', help='username cannot be blank', required=True)
-    parser.add_argument('email', help='email cannot be blank', required=True)
-    parser.add_argument('password', help='password cannot be blank', required=True)
+def parse_email(value):
+    if not isinstance(value, str) or not value.strip():
+        raise ValueError('email cannot be blank')
+    if '@' not in value or len(value) > 120:
+        raise ValueError('Please, enter valid email address.')
+    return value
+
 
-    data = parser.parse_args()
-    username = data['username']
-    email = data['email']
-    password = data['password']
+def parse_password(value):
+    if not isinstance(value, str) or not value:
+        raise ValueError('password cannot be blank')
+    if len(value) < 8:
+        raise ValueError('Password should consist of at least 8 symbols.')
+    return value
 
-    if '@' not in email:
-        return handle_error_format('Please, enter valid email address.',
-                                   'Field \'email\' in the request body.'), 400
 
-    if len(password) < 8:
-        return handle_error_format('Password should consist of at least 8 symbols.',
-                                   'Field \'password\' in the request body.'), 400
+USER_SCHEMA = Schema(
+    Field('username', text('username', 120)),
+    Field('email', parse_email),
+    Field('password', parse_password),
+)
+USER_UPDATE_SCHEMA = Schema(
+    Field('username', text('username', 120)),
+    Field('email', parse_email),
+)
 
-    if User.get_by_username(username):
-        return handle_error_format('User with such username already exists.',
-                                   'Field \'username\' in the request body.'), 400
+users_cli = AppGroup('users', help='Manage user accounts.')
+app.cli.add_command(users_cli)
+
+
+@app.route('/user/create', methods=['POST'])
+#@handle_server_exception
+def create_user():
+    try:
+        data = USER_SCHEMA.parse()
+    except BodyFieldError as e:
+        return e.to_response()
 
     user = User(
-        username=username,
-        email=email,
+        username=data['username'],
+        email=data['email'],
         password=User.generate_hash(data['password'])
     )
 
-
-    role = Role.get_by_name("user")
-    user.roles.append(role)
-    user.save_to_db()
+    try:
+        user.save_with_role_ids([role_registry.id_of('user')])
+    except IntegrityError as e:
+        db.session.rollback()
+        return duplicate_user_response(e)
 
     return {'message': 'User was successfully created'}, 200
    # except:
         #return {'message': 'Something went wrong'}, 500
 
 
+def duplicate_user_response(error):
+    """400 for a write rejected by the unique key on user.username or
+    user.email."""
+    field = get_unique_violation(error)
+    if field not in ('username', 'email'):
+        raise error
+    return handle_error_format('User with such {} already exists.'.format(field),
+                               'Field \'{}\' in the request body.'.format(field)), 400
+
+
+@app.route('/user/login', methods=['POST'])
+@basic_auth.login_required
+@handle_server_exception
+def login():
+    return {'token': issue_token(basic_auth.current_user()),
+            'expires_in': app.config['AUTH_TOKEN_TTL']}, 200
+
+
 @app.route('/user/<userId>', methods=['GET'])
 @auth.login_required(role='user')
 @handle_server_exception
@@ -55,7 +101,13 @@ def get_user_by_id(userId: int):
     if not user:
         return handle_error_format('User with such id does not exist.',
                                    'Field \'userId\' in path parameters.'), 404
-    return User.to_json(user)
+
+    # answered before to_json(), which loads the roles
+    etag = make_etag(user.id, user.version)
+    if is_not_modified(etag):
+        return not_modified(etag)
+
+    return User.to_json(user), 200, etag_header(etag)
 
 
 @app.route('/user/name/<username>', methods=['GET'])
@@ -73,36 +125,42 @@ def get_user_by_username(username: str):
 @auth.login_required(role='user')
 @handle_server_exception
 def update_user_by_id(userId: int):
-    parser = reqparse.RequestParser()
-
-    username1 = auth.current_user()
-    userr = User.get_by_id(userId)
-    auser = User.get_by_username(username1)
-    admin = Role.get_by_name("admin")
-    if username1 == userr.username or admin in auser.roles:
+    try:
+        data = USER_UPDATE_SCHEMA.parse()
+    except BodyFieldError as e:
+        return e.to_response()
 
-        parser.add_argument('username', help='username cannot be blank', required=True)
-        parser.add_argument('email', help='email cannot be blank', required=True)
-
-        data = parser.parse_args()
-        username = data['username']
-        email = data['email']
+    principal = auth.current_user()
+    user = User.get_by_id(userId)
 
-        user = User.get_by_id(userId)
+    if not user:
+        return handle_error_format('User with such id does not exist.',
+                                   'Field \'userId\' in path parameters.'), 404
 
-        if not user:
-            return handle_error_format('User with such id does not exist.',
-                                       'Field \'userId\' in path parameters.'), 404
+    if principal.username == user.username or 'admin' in principal.roles:
+        precondition = check_if_match(make_etag(user.id, user.version))
+        if precondition:
+            return precondition
 
-        if User.get_by_username(username):
-            return handle_error_format('User with such username already exists.',
-                                       'Field \'username\' in the request body.'), 404
+        old_username = user.username
+        user.username = data['username']
+        user.email = data['email']
+        user.bump_token_generation()
+        try:
+            user.save_to_db()
+        except IntegrityError as e:
+            db.session.rollback()
+            return duplicate_user_response(e)
+        except StaleDataError:
+            db.session.rollback()
+            return precondition_failed() if request.if_match else modified_concurrently()
+        credential_cache.forget(old_username)
+        revoke_tokens(user.id, user.token_generation)
 
-        user.username = username
-        user.email = email
-        user.save_to_db()
+        return User.to_json(user), 200, etag_header(make_etag(user.id, user.version))
 
-        return User.to_json(user)
+    return handle_error_format('You can only update your own account.',
+                               'Field \'userId\' in path parameters.'), 403
 
 
 @app.route('/user/<userId>', methods=['DELETE'])
@@ -111,4 +169,132 @@ def update_user_by_id(userId: int):
 def delete_user_by_id(userId: int):
     user = User.get_by_id(userId)
     if user:
-        return User.delete_by_id(userId)
+        # the commit of the delete expires user and its row is gone
+        user_id, username = user.id, user.username
+        credential_cache.forget(username)
+        result = User.delete_by_id(userId)
+        revoke_tokens(user_id)
+        return result
+
+
+@app.route('/users', methods=['GET'])
+@auth.login_required(role='admin')
+@handle_server_exception
+def get_users():
+    try:
+        after, limit = get_page_args()
+    except QueryArgumentError as e:
+        return e.to_response()
+
+    users = User.get_page(after, limit + 1)
+    role_ids = User.get_role_ids([user.id for user in users[:limit]])
+
+    return make_page('users', users, limit,
+                     lambda user: dict(serialize_listed_user(user), roles=list(role_registry.names(role_ids[user.id]))),
+                     lambda user: user.id)
+
+
+def validate_user_row(row):
+    """Returns (values, None) for a valid row, or (None, (message, field)).
+    Applies the same rules as create_user."""
+    return USER_SCHEMA.validate_row(row)
+
+
+def provision_user_rows(rows, batch_size, executor=hashing_executor):
+    """Creates users with the 'user' role batch by batch. Duplicates are
+    filtered out before hashing, the rest of the batch is hashed in parallel
+    and inserted in bulk. Every row gets a result."""
+    results = []
+    seen_usernames, seen_emails = set(), set()
+    role_id = role_registry.id_of('user')
+
+    for batch in batches(rows, batch_size):
+        valid = []
+        for index, row in batch:
+            values, error = validate_user_row(row)
+            if error:
+                results.append(row_error(index, 'invalid', *error))
+            elif values['username'] in seen_usernames:
+                results.append(row_error(index, 'conflict', 'User with such username is repeated in the request.',
+                                         'username'))
+            elif values['email'] in seen_emails:
+                results.append(row_error(index, 'conflict', 'User with such email is repeated in the request.',
+                                         'email'))
+            else:
+                seen_usernames.add(values['username'])
+                seen_emails.add(values['email'])
+                valid.append((index, values))
+
+        usernames, emails = User.get_existing([values['username'] for _, values in valid],
+                                              [values['email'] for _, values in valid])
+        inserts = []
+        for index, values in valid:
+            if values['username'] in usernames:
+                results.append(row_error(index, 'conflict', 'User with such username already exists.', 'username'))
+            elif values['email'] in emails:
+                results.append(row_error(index, 'conflict', 'User with such email already exists.', 'email'))
+            else:
+                inserts.append((index, values))
+
+        if not inserts:
+            continue
+
+        hashes = hash_passwords([values['password'] for _, values in inserts], executor)
+        for (_, values), password_hash in zip(inserts, hashes):
+            values['password'] = password_hash
+
+        try:
+            User.insert_many([values for _, values in inserts], role_id)
+            results.extend({'index': index, 'status': 'created'} for index, _ in inserts)
+        except IntegrityError:
+            # a concurrent writer took some of the names, retry row by row
+            db.session.rollback()
+            for index, values in inserts:
+                if User.insert_one(values, role_id):
+                    results.append({'index': index, 'status': 'created'})
+                else:
+                    results.append(row_error(index, 'conflict', 'User with such username or email already exists.',
+                                             'username'))
+            db.session.commit()
+
+    return results
+
+
+@app.route('/users/bulk', methods=['POST'])
+@auth.login_required(role='admin')
+@handle_server_exception
+def provision_users():
+    try:
+        batch_size = get_int_arg('batch_size', app.config['BULK_BATCH_SIZE'],
+                                 minimum=1, maximum=MAX_BULK_BATCH_SIZE)
+    except QueryArgumentError as e:
+        return e.to_response()
+
+    if request.mimetype == 'application/x-ndjson':
+        rows = read_ndjson(request.stream)
+    else:
+        rows = request.get_json(silent=True)
+        if not isinstance(rows, list):
+            return handle_error_format('Request body should be a JSON array or NDJSON.',
+                                       'Request body.'), 400
+
+    return summarize(provision_user_rows(rows, batch_size)), 200
+
+
+@users_cli.command('provision')
+@click.argument('source', type=click.File('r'))
+@click.option('--batch-size', default=None, type=int, help='Rows per INSERT batch.')
+@click.option('--workers', default=None, type=int, help='Hashing processes, one per core by default.')
+def provision_users_command(source, batch_size, workers):
+    """Creates users from an NDJSON file of {username, email, password}
+    objects and prints the rows that failed."""
+    batch_size = batch_size or app.config['BULK_BATCH_SIZE']
+    # the command runs in its own process, so it may have its own pool
+    executor = hashing_executor if workers is None else \
+        HashingExecutor(workers, 0, app.config['HASHING_TIMEOUT'])
+
+    summary = summarize(provision_user_rows(read_ndjson(source), batch_size, executor))
+    for result in summary['results']:
+        if result['status'] != 'created':
+            click.echo(json.dumps(result))
+    click.echo('{} created, {} failed'.format(summary['created'], summary['failed']))
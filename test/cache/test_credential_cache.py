@@ -0,0 +1,36 @@
+from unittest import TestCase
+
+from src.cache import CredentialCache
+
+
+class TestCredentialCache(TestCase):
+
+    def setUp(self) -> None:
+        self.cache = CredentialCache(maxsize=10, ttl=60)
+
+    def test_check(self):
+        self.cache.remember('username', 'password', 'hash')
+
+        self.assertTrue(self.cache.check('username', 'password', 'hash'))
+
+    def test_check_wrong_password(self):
+        self.cache.remember('username', 'password', 'hash')
+
+        self.assertFalse(self.cache.check('username', 'wrong', 'hash'))
+
+    def test_check_changed_hash(self):
+        self.cache.remember('username', 'password', 'hash')
+
+        self.assertFalse(self.cache.check('username', 'password', 'new_hash'))
+
+    def test_password_is_not_stored(self):
+        self.cache.remember('username', 'password', 'hash')
+
+        self.assertNotIn(b'password', self.cache._entries.get('username'))
+
+    def test_forget(self):
+        self.cache.remember('username', 'password', 'hash')
+
+        self.cache.forget('username')
+
+        self.assertFalse(self.cache.check('username', 'password', 'hash'))
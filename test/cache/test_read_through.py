@@ -0,0 +1,49 @@
+from unittest import TestCase, mock
+
+from src.cache import ReadThroughCache
+
+
+class TestReadThroughCache(TestCase):
+
+    def setUp(self) -> None:
+        self.cache = ReadThroughCache(maxsize=2, ttl=10)
+
+    def test_get_loads_once(self):
+        load = mock.Mock(return_value='value')
+
+        self.assertEqual('value', self.cache.get('key', load))
+        self.assertEqual('value', self.cache.get('key', load))
+
+        load.assert_called_once_with('key')
+        self.assertEqual({'size': 1, 'maxsize': 2, 'hits': 1, 'misses': 1, 'evictions': 0, 'loads': 1},
+                         self.cache.stats())
+
+    def test_get_does_not_cache_none(self):
+        load = mock.Mock(return_value=None)
+
+        self.cache.get('key', load)
+        self.cache.get('key', load)
+
+        self.assertEqual(2, load.call_count)
+
+    def test_invalidate(self):
+        self.cache.get('key', lambda key: 'old')
+
+        self.cache.invalidate('key')
+
+        self.assertEqual('new', self.cache.get('key', lambda key: 'new'))
+
+    def test_invalidate_during_load(self):
+        def load(key):
+            self.cache.invalidate(key)
+            return 'stale'
+
+        self.assertEqual('stale', self.cache.get('key', load))
+        self.assertEqual(0, self.cache.stats()['size'])
+
+    def test_size_cap(self):
+        for key in ('a', 'b', 'c'):
+            self.cache.get(key, str.upper)
+
+        self.assertEqual(2, self.cache.stats()['size'])
+        self.assertEqual(1, self.cache.stats()['evictions'])
@@ -0,0 +1,60 @@
+from unittest import TestCase
+
+from src.cache import TTLCache
+
+
+class FakeTimer:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTTLCache(TestCase):
+
+    def setUp(self) -> None:
+        self.timer = FakeTimer()
+        self.cache = TTLCache(maxsize=2, ttl=10, timer=self.timer)
+
+    def test_get(self):
+        self.cache.set('key', 'value')
+
+        result = self.cache.get('key')
+
+        self.assertEqual('value', result)
+        self.assertEqual(1, self.cache.hits)
+
+    def test_get_missing(self):
+        result = self.cache.get('key', 'default')
+
+        self.assertEqual('default', result)
+        self.assertEqual(1, self.cache.misses)
+
+    def test_get_expired(self):
+        self.cache.set('key', 'value')
+        self.timer.now = 10
+
+        result = self.cache.get('key')
+
+        self.assertIsNone(result)
+        self.assertEqual(0, len(self.cache))
+
+    def test_set_evicts_least_recently_used(self):
+        self.cache.set('first', 1)
+        self.cache.set('second', 2)
+        self.cache.get('first')
+        self.cache.set('third', 3)
+
+        self.assertEqual(1, self.cache.get('first'))
+        self.assertIsNone(self.cache.get('second'))
+        self.assertEqual(1, self.cache.evictions)
+
+    def test_pop(self):
+        self.cache.set('key', 'value')
+
+        result = self.cache.pop('key')
+
+        self.assertEqual('value', result)
+        self.assertIsNone(self.cache.get('key'))
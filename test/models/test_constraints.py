@@ -0,0 +1,28 @@
+from unittest import TestCase
+
+from sqlalchemy.exc import IntegrityError
+
+from src.model.constraints import get_unique_violation
+
+
+class TestConstraints(TestCase):
+
+    def test_get_unique_violation_mysql(self):
+        error = IntegrityError('INSERT', {}, Exception(1062, "Duplicate entry 'name' for key 'film.name'"))
+
+        self.assertEqual('name', get_unique_violation(error))
+
+    def test_get_unique_violation_old_mysql(self):
+        error = IntegrityError('INSERT', {}, Exception(1062, "Duplicate entry 'a@b' for key 'email'"))
+
+        self.assertEqual('email', get_unique_violation(error))
+
+    def test_get_unique_violation_sqlite(self):
+        error = IntegrityError('INSERT', {}, Exception('UNIQUE constraint failed: user.username'))
+
+        self.assertEqual('username', get_unique_violation(error))
+
+    def test_get_unique_violation_other(self):
+        error = IntegrityError('INSERT', {}, Exception(1452, 'Cannot add or update a child row'))
+
+        self.assertIsNone(get_unique_violation(error))
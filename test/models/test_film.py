@@ -1,5 +1,7 @@
+from datetime import date
 from unittest import TestCase, mock
 from src.model import Film
+from src.model.film import parse_duration
 
 
 
@@ -8,7 +10,7 @@ class TestFilm(TestCase):
     def setUp(self) -> None:
         self.film = Film(
             name='name',
-            duration='100',
+            duration=100,
             state='state',
             created_at='created_at'
         )
@@ -16,7 +18,7 @@ class TestFilm(TestCase):
     def test_to_json(self):
         film = self.film
         expected_json = {'created_at': 'created_at',
-                         'duration': '100',
+                         'duration': 100,
                          'name': 'name',
                          'id': None,
                          'state': 'state'}
@@ -73,6 +75,24 @@ class TestFilm(TestCase):
         mock_query_property_getter.return_value.filter_by.return_value.delete.assert_called_once_with()
         mock_commit.assert_called_once_with()
 
+    @mock.patch('src.model.film.film_cache.invalidate')
+    @mock.patch('src.app.db.session.commit')
+    @mock.patch('flask_sqlalchemy.model._QueryProperty.__get__')
+    @mock.patch('src.model.film.Film.get_by_id')
+    def test_delete_by_id_invalidates_cache(self, mock_get_by_id, mock_query_property_getter, mock_commit,
+                                            mock_invalidate):
+        film = self.film
+        film.id = 1
+        mock_get_by_id.return_value = film
+
+        def expire():
+            film.id = None
+        mock_commit.side_effect = expire
+
+        Film.delete_by_id(1)
+
+        mock_invalidate.assert_called_once_with(1)
+
     @mock.patch('src.model.film.Film.get_by_id')
     def test_delete_by_id_not_found(self, mock_get_by_id):
         mock_get_by_id.return_value = None
@@ -82,4 +102,38 @@ class TestFilm(TestCase):
         self.assertEqual(({'errors': [{'message': 'Film with such id does not exist.',
                                         'source': "Field 'FilmId' in path parameters."}],
                            'traceId': result[0].get('traceId')}, 404), result)
-        mock_get_by_id.assert_called_once_with(1)
\ No newline at end of file
+        mock_get_by_id.assert_called_once_with(1)
+
+    @mock.patch('flask_sqlalchemy.model._QueryProperty.__get__')
+    def test_get_page(self, mock_query_property_getter):
+        query = mock_query_property_getter.return_value
+        query.filter.return_value = query
+        query.order_by.return_value.limit.return_value.all.return_value = [self.film]
+
+        result = Film.get_page(after=10, limit=5, state='Done')
+
+        self.assertEqual([self.film], result)
+        self.assertEqual(2, query.filter.call_count)
+        query.order_by.return_value.limit.assert_called_once_with(5)
+
+    @mock.patch('flask_sqlalchemy.model._QueryProperty.__get__')
+    def test_get_page_by_created_at(self, mock_query_property_getter):
+        query = mock_query_property_getter.return_value
+        query.filter.return_value = query
+        query.order_by.return_value.limit.return_value.all.return_value = [self.film]
+
+        result = Film.get_page(after=(date(2022, 1, 2), 9), limit=5, created_from=date(2022, 1, 1))
+
+        self.assertEqual([self.film], result)
+        self.assertEqual(2, query.filter.call_count)
+        self.assertEqual(['Film.created_at', 'Film.id'],
+                         [str(column) for column in query.order_by.call_args.args])
+
+    def test_parse_duration(self):
+        for value in (100, '100', '100 min', '1h 40m', '1:40', '1 hour 40 minutes'):
+            self.assertEqual(100, parse_duration(value))
+
+    def test_parse_duration_invalid(self):
+        for value in (None, '', 'long', '0', -5, '1:75', True):
+            with self.assertRaises(ValueError):
+                parse_duration(value)
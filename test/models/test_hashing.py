@@ -0,0 +1,126 @@
+from concurrent.futures import Future
+from time import sleep
+from unittest import TestCase, mock
+
+from threading import Event, Thread
+from src.app import app
+from src.model import User
+from src.model.hashing import hash_passwords, HashingExecutor, HashingSaturatedError
+
+
+class TestHashing(TestCase):
+
+    def test_hash_passwords_inline(self):
+        result = hash_passwords(['password1', 'password2'], HashingExecutor(workers=0, queue_size=0, timeout=1))
+
+        self.assertTrue(User.verify_hash('password1', result[0]))
+        self.assertTrue(User.verify_hash('password2', result[1]))
+
+    @mock.patch('src.model.hashing.ProcessPoolExecutor')
+    def test_hash_passwords_pool(self, mock_pool):
+        futures = [Future(), Future()]
+        futures[0].set_result(['hash1'])
+        futures[1].set_result(['hash2'])
+        mock_pool.return_value.submit.side_effect = futures
+        executor = HashingExecutor(workers=2, queue_size=0, timeout=1)
+
+        result = hash_passwords(['password1', 'password2'], executor)
+
+        self.assertEqual(['hash1', 'hash2'], result)
+        self.assertEqual(2, mock_pool.return_value.submit.call_count)
+        self.assertEqual(0, executor.stats()['in_flight'])
+
+
+class TestHashingExecutor(TestCase):
+
+    def test_run_inline(self):
+        executor = HashingExecutor(workers=0, queue_size=0, timeout=1)
+
+        result = executor.run(max, 1, 2)
+
+        self.assertEqual(2, result)
+
+    @mock.patch('src.model.hashing.ProcessPoolExecutor')
+    def test_run(self, mock_pool):
+        future = Future()
+        future.set_result('hash')
+        mock_pool.return_value.submit.return_value = future
+        executor = HashingExecutor(workers=2, queue_size=1, timeout=1)
+
+        result = executor.run(max, 1, 2)
+
+        self.assertEqual('hash', result)
+        mock_pool.return_value.submit.assert_called_once_with(max, 1, 2)
+        self.assertEqual({'workers': 2, 'queue_size': 1, 'in_flight': 0, 'queued': 0,
+                          'completed': 1, 'rejected': 0, 'timeouts': 0, 'errors': 0}, executor.stats())
+
+    @mock.patch('src.model.hashing.ProcessPoolExecutor')
+    def test_run_error(self, mock_pool):
+        future = Future()
+        future.set_exception(ValueError('bad hash'))
+        mock_pool.return_value.submit.return_value = future
+        executor = HashingExecutor(workers=1, queue_size=0, timeout=1)
+
+        with self.assertRaises(ValueError):
+            executor.run(max, 1, 2)
+
+        self.assertEqual((0, 1, 0), (executor.completed, executor.errors, executor.in_flight))
+
+    @mock.patch('src.model.hashing.ProcessPoolExecutor')
+    def test_run_timeout_cancels_queued_job(self, mock_pool):
+        future = Future()
+        mock_pool.return_value.submit.return_value = future
+        executor = HashingExecutor(workers=1, queue_size=0, timeout=0.01)
+
+        with self.assertRaises(HashingSaturatedError):
+            executor.run(max, 1, 2)
+
+        self.assertTrue(future.cancelled())
+        self.assertEqual({'in_flight': 0, 'completed': 0, 'timeouts': 1},
+                         {key: executor.stats()[key] for key in ('in_flight', 'completed', 'timeouts')})
+
+    def test_run_timeout_keeps_slot_of_running_job(self):
+        executor = HashingExecutor(workers=1, queue_size=0, timeout=0.05)
+        executor.run(sleep, 0)
+
+        with self.assertRaises(HashingSaturatedError):
+            executor.run(sleep, 0.5)
+        # the job still runs in the pool, so the next call is turned away at once
+        with self.assertRaises(HashingSaturatedError):
+            executor.run(sleep, 0)
+        stats = executor.stats()
+        executor._get_pool().shutdown(wait=True)
+
+        self.assertEqual({'in_flight': 1, 'completed': 1, 'rejected': 1, 'timeouts': 1},
+                         {key: stats[key] for key in ('in_flight', 'completed', 'rejected', 'timeouts')})
+        self.assertEqual(0, executor.stats()['in_flight'])
+
+    @mock.patch('src.model.hashing.ProcessPoolExecutor')
+    def test_run_saturated(self, mock_pool):
+        started, release = Event(), Event()
+
+        def result(timeout):
+            started.set()
+            release.wait(1)
+            return 'hash'
+
+        mock_pool.return_value.submit.return_value.result.side_effect = result
+        executor = HashingExecutor(workers=1, queue_size=0, timeout=1)
+        busy = Thread(target=executor.run, args=(max, 1, 2))
+        busy.start()
+        started.wait(1)
+
+        with self.assertRaises(HashingSaturatedError):
+            executor.run(max, 1, 2)
+
+        release.set()
+        busy.join()
+        self.assertEqual(1, executor.stats()['rejected'])
+
+    def test_saturated_response(self):
+        with app.test_request_context():
+            response = app.make_response(app.handle_user_exception(HashingSaturatedError()))
+
+        self.assertEqual(503, response.status_code)
+        self.assertEqual('1', response.headers['Retry-After'])
+        self.assertEqual('Server.', response.get_json()['errors'][0]['source'])
@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta
+from unittest import TestCase, mock
+
+from src.model.scheduling import Screening, find_overlaps, check_schedule
+
+
+def at(hour, minutes=0):
+    return datetime(2022, 12, 1, hour, minutes)
+
+
+class TestScheduling(TestCase):
+
+    def test_find_overlaps(self):
+        existing = Screening(at(10), at(12), 1, schedule_id=1)
+        overlapping = Screening(at(11), at(13), 2, index=0)
+        adjacent = Screening(at(13), at(15), 2, index=1)
+
+        result = find_overlaps([adjacent, overlapping, existing])
+
+        self.assertEqual([(existing, overlapping)], result)
+
+    def test_find_overlaps_ignores_existing_pairs(self):
+        first = Screening(at(10), at(12), 1, schedule_id=1)
+        second = Screening(at(11), at(13), 1, schedule_id=2)
+
+        result = find_overlaps([first, second])
+
+        self.assertEqual([], result)
+
+    def test_find_overlaps_contained(self):
+        long = Screening(at(10), at(18), 1, index=0)
+        short = Screening(at(11), at(12), 2, index=1)
+        later = Screening(at(14), at(15), 2, index=2)
+
+        result = find_overlaps([long, short, later])
+
+        self.assertEqual([(long, short), (long, later)], result)
+
+    @mock.patch('src.model.film.Schedule.get_starting_between')
+    @mock.patch('src.model.film.Film.get_max_duration')
+    @mock.patch('src.model.film.Film.get_durations')
+    def test_check_schedule(self, mock_get_durations, mock_get_max_duration, mock_get_starting_between):
+        mock_get_durations.return_value = {1: 120}
+        mock_get_max_duration.return_value = 180
+        mock_get_starting_between.return_value = [(7, 2, at(9), 180)]
+
+        overlaps, unknown = check_schedule([(1, at(11))])
+
+        self.assertEqual([], unknown)
+        self.assertEqual([(Screening(at(9), at(12), 2, schedule_id=7), Screening(at(11), at(13), 1, index=0))],
+                         overlaps)
+        mock_get_starting_between.assert_called_once_with(at(8), at(13))
+
+    @mock.patch('src.model.film.Film.get_durations')
+    def test_check_schedule_unknown_film(self, mock_get_durations):
+        mock_get_durations.return_value = {}
+
+        overlaps, unknown = check_schedule([(1, at(11))])
+
+        self.assertEqual(([], [1]), (overlaps, unknown))
+
+    def test_screening_to_json(self):
+        self.assertEqual({'film_id': 1, 'start': at(10), 'end': at(12), 'schedule_id': 3},
+                         Screening(at(10), at(12), 1, schedule_id=3).to_json())
+        self.assertEqual(timedelta(hours=2), Screening(at(10), at(12), 1, index=0).end - at(10))
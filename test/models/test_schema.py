@@ -0,0 +1,57 @@
+from unittest import TestCase, mock
+
+from src.app import app
+from src.model.schema import bootstrap_schema, verify_schema, SchemaMismatchError
+
+
+class TestSchema(TestCase):
+
+    def tearDown(self) -> None:
+        app.config['SCHEMA_BOOTSTRAP'] = 'verify'
+
+    @mock.patch('src.model.schema.get_current_revisions')
+    @mock.patch('src.model.schema.get_head_revisions')
+    def test_verify_schema(self, mock_get_head_revisions, mock_get_current_revisions):
+        mock_get_head_revisions.return_value = {'025eea1deb1c'}
+        mock_get_current_revisions.return_value = {'025eea1deb1c'}
+
+        verify_schema()
+
+        mock_get_current_revisions.assert_called_once_with()
+
+    @mock.patch('src.model.schema.get_current_revisions')
+    @mock.patch('src.model.schema.get_head_revisions')
+    def test_verify_schema_behind_head(self, mock_get_head_revisions, mock_get_current_revisions):
+        mock_get_head_revisions.return_value = {'025eea1deb1c'}
+        mock_get_current_revisions.return_value = set()
+
+        with self.assertRaises(SchemaMismatchError):
+            verify_schema()
+
+    @mock.patch('src.model.schema.verify_schema')
+    @mock.patch('src.model.schema.upgrade')
+    def test_bootstrap_schema_upgrade(self, mock_upgrade, mock_verify_schema):
+        app.config['SCHEMA_BOOTSTRAP'] = 'upgrade'
+
+        bootstrap_schema(app)
+
+        mock_upgrade.assert_called_once()
+        mock_verify_schema.assert_called_once_with()
+
+    @mock.patch('src.model.schema.verify_schema')
+    @mock.patch('src.app.db.create_all')
+    def test_bootstrap_schema_create(self, mock_create_all, mock_verify_schema):
+        app.config['SCHEMA_BOOTSTRAP'] = 'create'
+
+        bootstrap_schema(app)
+
+        mock_create_all.assert_called_once_with()
+        mock_verify_schema.assert_not_called()
+
+    @mock.patch('src.model.schema.verify_schema')
+    def test_bootstrap_schema_skip(self, mock_verify_schema):
+        app.config['SCHEMA_BOOTSTRAP'] = 'skip'
+
+        bootstrap_schema(app)
+
+        mock_verify_schema.assert_not_called()
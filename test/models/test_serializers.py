@@ -0,0 +1,57 @@
+from datetime import date, datetime
+from unittest import TestCase
+from flask.json.provider import DefaultJSONProvider
+
+from src.app import app
+from src.model import Film, State, User
+from src.model.film import Schedule, serialize_film
+from src.model.user import serialize_listed_user, serialize_user
+from src.model.serializers import compile_serializer
+
+
+class TestSerializers(TestCase):
+
+    def setUp(self) -> None:
+        self.stdlib = DefaultJSONProvider(app)
+        self.film = Film(id=1, name='name', duration=100, state=State.Done, created_at=date(2022, 12, 1))
+
+    def test_serialize_film_matches_to_json(self):
+        with app.app_context():
+            self.assertEqual(self.stdlib.dumps(self.film.to_json(), separators=(',', ':')),
+                             app.json.dumps(serialize_film(self.film), separators=(',', ':')))
+
+    def test_serialize_film_converts_dates_only(self):
+        self.assertEqual({'id': 1, 'name': 'name', 'duration': 100, 'state': 'Done',
+                          'created_at': 'Thu, 01 Dec 2022 00:00:00 GMT'}, serialize_film(self.film))
+
+    def test_serialize_film_without_date(self):
+        self.film.created_at = None
+
+        self.assertIsNone(serialize_film(self.film)['created_at'])
+
+    def test_serialize_user(self):
+        user = User(id=2, username='username', email='email', password='password')
+
+        self.assertEqual({'id': 2, 'username': 'username', 'email': 'email', 'password': 'password'},
+                         serialize_user(user))
+
+    def test_serialize_listed_user(self):
+        user = User(id=2, username='username', email='email', password='password')
+
+        self.assertEqual({'id': 2, 'username': 'username', 'email': 'email'}, serialize_listed_user(user))
+
+    def test_positional_rows(self):
+        serialize = compile_serializer([Schedule.id, Schedule.date], access='index')
+
+        self.assertEqual({'id': 3, 'date': 'Thu, 01 Dec 2022 18:30:00 GMT'},
+                         serialize((3, datetime(2022, 12, 1, 18, 30))))
+
+    def test_instance_falls_back_to_attributes(self):
+        film = Film(name='name', duration=100)
+
+        self.assertEqual({'id': None, 'name': 'name', 'duration': 100, 'state': None, 'created_at': None},
+                         serialize_film(film))
+
+    def test_unknown_access(self):
+        with self.assertRaises(ValueError):
+            compile_serializer([Film.id], access='mapping')
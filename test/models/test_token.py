@@ -0,0 +1,136 @@
+from unittest import TestCase, mock
+
+from src.app import app
+from src.model.user import Principal
+from src.model.token import TokenGenerations, issue_token, load_token, revoke_tokens, verify_token
+
+
+class TestToken(TestCase):
+
+    def setUp(self) -> None:
+        self.principal = Principal(1, 'username', ('user', 'admin'))
+
+    def tearDown(self) -> None:
+        app.config['AUTH_TOKEN_TTL'] = 900
+
+    def test_load_token(self):
+        token = issue_token(self.principal)
+
+        result = load_token(token)
+
+        self.assertEqual(self.principal, result)
+
+    def test_load_token_tampered(self):
+        _, timestamp, signature = issue_token(self.principal).split('.')
+        payload = issue_token(Principal(1, 'username', ('user', 'admin', 'root'))).split('.')[0]
+
+        result = load_token('.'.join((payload, timestamp, signature)))
+
+        self.assertIsNone(result)
+
+    def test_load_token_expired(self):
+        token = issue_token(self.principal)
+        app.config['AUTH_TOKEN_TTL'] = -1
+
+        result = load_token(token)
+
+        self.assertIsNone(result)
+
+    @mock.patch('src.model.token.token_generations', new_callable=TokenGenerations)
+    def test_load_token_revoked(self, mock_generations):
+        token = issue_token(self.principal)
+
+        revoke_tokens(self.principal.id, 1)
+
+        self.assertIsNone(load_token(token))
+        principal = self.principal._replace(token_generation=1)
+        self.assertEqual(principal, load_token(issue_token(principal)))
+
+    @mock.patch('src.model.token.token_generations', new_callable=TokenGenerations)
+    def test_load_token_deleted_user(self, mock_generations):
+        token = issue_token(self.principal)
+
+        revoke_tokens(self.principal.id)
+
+        self.assertIsNone(load_token(token))
+
+    def test_verify_token_garbage(self):
+        result = verify_token('garbage')
+
+        self.assertIsNone(result)
+
+
+class TestTokenGenerations(TestCase):
+
+    def setUp(self) -> None:
+        self.generations = TokenGenerations()
+
+    def load(self, rows):
+        with mock.patch('src.model.token.db') as mock_db:
+            connection = mock_db.engine.connect.return_value.__enter__.return_value
+            connection.execute.return_value.all.return_value = rows
+            self.generations.load()
+
+    def test_get_before_load(self):
+        self.assertEqual(0, self.generations.get(1))
+
+    def get_looked_up(self, user_id, generation):
+        """get(user_id) with the database answering generation, or no row for None."""
+        with mock.patch('src.model.token.db') as mock_db:
+            connection = mock_db.engine.connect.return_value.__enter__.return_value
+            connection.execute.return_value.scalar.return_value = generation
+            result = self.generations.get(user_id)
+        return result, connection.execute.call_count
+
+    def test_get_after_load(self):
+        self.load([(1, 0), (2, 3), (4, 1)])
+
+        self.assertEqual([0, 3, 1], [self.generations.get(user_id) for user_id in (1, 2, 4)])
+        # deleted
+        self.assertIsNone(self.generations.get(3))
+
+    def test_get_looks_up_ids_above_the_loaded_ones_once(self):
+        self.load([(1, 0)])
+
+        self.assertEqual((0, 1), self.get_looked_up(5, 0))
+        self.assertEqual((0, 0), self.get_looked_up(5, 0))
+        self.assertEqual((None, 1), self.get_looked_up(6, None))
+
+    def test_reload_after_deleting_the_highest_id(self):
+        self.load([(1, 0), (2, 0)])
+        self.generations.set(2, None)
+
+        self.load([(1, 0)])
+
+        self.assertEqual((None, 0), self.get_looked_up(2, 0))
+
+    def test_load_after_restart_looks_up_deleted_highest_id(self):
+        self.load([(1, 0)])
+
+        self.assertEqual((None, 1), self.get_looked_up(2, None))
+
+    def test_load_replaces_snapshot(self):
+        self.load([(1, 0), (2, 0)])
+        self.generations.set(1, 1)
+
+        self.load([(1, 2), (3, 0)])
+
+        self.assertEqual((2, None), (self.generations.get(1), self.generations.get(2)))
+
+    def test_load_keeps_changes_made_while_reading(self):
+        def read_before_commit(statement):
+            self.generations.set(1, 1)
+            self.generations.set(2, None)
+            return mock.Mock(all=mock.Mock(return_value=[(1, 0), (2, 0)]))
+
+        with mock.patch('src.model.token.db') as mock_db:
+            connection = mock_db.engine.connect.return_value.__enter__.return_value
+            connection.execute.side_effect = read_before_commit
+            self.generations.load()
+
+        self.assertEqual((1, None), (self.generations.get(1), self.generations.get(2)))
+
+    def test_start_refresh_disabled(self):
+        self.generations.start_refresh(0)
+
+        self.assertIsNone(self.generations._thread)
@@ -1,7 +1,7 @@
 from unittest import TestCase, mock
 
 from src.model import User, Role
-from src.model.user import verify_hash, get_user_roles
+from src.model.user import verify_hash, get_user_roles, credential_cache, Principal, RoleRegistry
 
 
 class TestUser(TestCase):
@@ -83,6 +83,32 @@ class TestUser(TestCase):
 
         self.assertEqual(user, result)
 
+    def test_to_json_with_role_names(self):
+        result = self.user.to_json(('user', 'admin'))
+
+        self.assertEqual(['user', 'admin'], result['roles'])
+
+    @mock.patch('flask_sqlalchemy.model._QueryProperty.__get__')
+    def test_get_page(self, mock_query_property_getter):
+        query = mock_query_property_getter.return_value
+        query.filter.return_value = query
+        query.order_by.return_value.limit.return_value.all.return_value = [self.user]
+
+        result = User.get_page(after_id=10, limit=5)
+
+        self.assertEqual([self.user], result)
+        query.filter.assert_called_once()
+        query.order_by.return_value.limit.assert_called_once_with(5)
+
+    @mock.patch('src.app.db.session.query')
+    def test_get_role_ids(self, mock_query):
+        mock_query.return_value.filter.return_value.order_by.return_value.all.return_value = [(1, 1), (1, 2)]
+
+        result = User.get_role_ids([1, 2])
+
+        self.assertEqual({1: [1, 2], 2: []}, result)
+        mock_query.return_value.filter.return_value.order_by.return_value.all.assert_called_once_with()
+
     @mock.patch('src.app.db.session.commit')
     @mock.patch('flask_sqlalchemy.model._QueryProperty.__get__')
     @mock.patch('src.model.user.User.get_by_id')
@@ -116,9 +142,10 @@ class TestRole(TestCase):
 
         self.assertEqual(expected_json, result)
 
+    @mock.patch('src.model.user.RoleRegistry.invalidate')
     @mock.patch('src.app.db.session.commit')
     @mock.patch('src.app.db.session.add')
-    def test_save_to_db(self, mock_add, mock_commit):
+    def test_save_to_db(self, mock_add, mock_commit, mock_invalidate):
         role = Role(id=1, name='user')
 
         mock_add.return_value = None
@@ -128,6 +155,7 @@ class TestRole(TestCase):
 
         mock_add.assert_called_once_with(role)
         mock_commit.assert_called_once_with()
+        mock_invalidate.assert_called_once_with()
 
     @mock.patch('flask_sqlalchemy.model._QueryProperty.__get__')
     def test_get_by_name(self, mock_query_property_getter):
@@ -148,36 +176,104 @@ class TestRole(TestCase):
         self.assertEqual(role, result)
 
     @mock.patch('src.model.user.User.verify_hash')
-    @mock.patch('src.model.user.User.get_by_username')
-    def test_verify_hash(self, mock_get_by_username, mock_verify_hash):
+    @mock.patch('src.model.user.User.get_with_role_ids')
+    def test_verify_hash(self, mock_get_with_role_ids, mock_verify_hash):
         user = User(
             username='username',
             email='email',
             password='password'
         )
-        mock_get_by_username.return_value = user
+        mock_get_with_role_ids.return_value = (user, ())
         mock_verify_hash.return_value = True
 
         result = verify_hash('password', 'username')
 
         self.assertTrue(result)
 
+    @mock.patch('src.model.user.RoleRegistry.names')
+    @mock.patch('src.model.user.User.verify_hash')
+    @mock.patch('src.model.user.User.get_with_role_ids')
+    def test_verify_hash_returns_principal(self, mock_get_with_role_ids, mock_verify_hash, mock_names):
+        user = User(
+            id=1,
+            username='username',
+            email='email',
+            password='password',
+            token_generation=2
+        )
+        mock_get_with_role_ids.return_value = (user, (1,))
+        mock_verify_hash.return_value = True
+        mock_names.return_value = ('user',)
+
+        result = verify_hash('username', 'password')
 
+        self.assertEqual(Principal(1, 'username', ('user',), 2), result)
+        mock_get_with_role_ids.assert_called_once_with('username')
+        mock_names.assert_called_once_with((1,))
 
-    @mock.patch('src.model.user.User.get_by_username')
-    def test_get_user_roles(self, mock_get_by_username):
+    @mock.patch('src.model.user.User.verify_hash')
+    @mock.patch('src.model.user.User.get_with_role_ids')
+    def test_verify_hash_cached(self, mock_get_with_role_ids, mock_verify_hash):
+        credential_cache.clear()
         user = User(
             username='username',
             email='email',
-            password='password'
+            password='hash'
         )
-        role1 = Role(id=1, name='user')
-        role2 = Role(id=2, name='admin')
-        user.roles.append(role1)
-        user.roles.append(role2)
-        mock_get_by_username.return_value = user
+        mock_get_with_role_ids.return_value = (user, ())
+        mock_verify_hash.return_value = True
+
+        verify_hash('username', 'password')
+        result = verify_hash('username', 'password')
+
+        self.assertEqual('username', result.username)
+        mock_verify_hash.assert_called_once_with('password', 'hash')
+
+
+    def test_get_user_roles(self):
+        principal = Principal(1, 'username', ('user', 'admin'))
+
+        result = get_user_roles(principal)
+
+        self.assertEqual(result, ('user', 'admin'))
+
+
+class TestRoleRegistry(TestCase):
+
+    def setUp(self) -> None:
+        self.registry = RoleRegistry()
+
+    @mock.patch('src.app.db.session.query')
+    def test_id_of(self, mock_query):
+        mock_query.return_value.all.return_value = [(1, 'user'), (2, 'admin')]
+
+        self.assertEqual(2, self.registry.id_of('admin'))
+        self.assertEqual(1, self.registry.id_of('user'))
+        mock_query.return_value.all.assert_called_once_with()
+
+    @mock.patch('src.app.db.session.query')
+    def test_names(self, mock_query):
+        mock_query.return_value.all.return_value = [(1, 'user'), (2, 'admin')]
+
+        result = self.registry.names((1, 2))
+
+        self.assertEqual(('user', 'admin'), result)
+
+    @mock.patch('src.app.db.session.query')
+    def test_names_reloads_on_unknown_id(self, mock_query):
+        mock_query.return_value.all.side_effect = [[(1, 'user')], [(1, 'user'), (3, 'manager')]]
+
+        self.registry.names((1,))
+        result = self.registry.names((1, 3))
+
+        self.assertEqual(('user', 'manager'), result)
 
-        result = get_user_roles('username')
+    @mock.patch('src.app.db.session.query')
+    def test_invalidate(self, mock_query):
+        mock_query.return_value.all.return_value = [(1, 'user')]
 
-        self.assertEqual(result, ['user', 'admin'])
+        self.registry.id_of('user')
+        self.registry.invalidate()
+        self.registry.id_of('user')
 
+        self.assertEqual(2, mock_query.return_value.all.call_count)
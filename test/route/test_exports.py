@@ -0,0 +1,47 @@
+from datetime import date
+from unittest import TestCase, mock
+from undecorated import undecorated
+
+from src.app import app
+from src.model import Film, State
+from src.route import export_films
+from src.route.exports import ndjson_chunks, csv_chunks
+
+
+class TestExports(TestCase):
+
+    def setUp(self) -> None:
+        self.columns = [Film.id, Film.name, Film.state, Film.created_at]
+        self.partitions = [[(1, 'name', State.Done, date(2022, 12, 1))],
+                           [(2, 'name2', State.InProduction, None)]]
+
+    def test_ndjson_chunks(self):
+        with app.app_context():
+            result = list(ndjson_chunks(self.columns, iter(self.partitions)))
+
+        self.assertEqual(['{"id":1,"name":"name","state":"Done","created_at":"Thu, 01 Dec 2022 00:00:00 GMT"}\n',
+                          '{"id":2,"name":"name2","state":"InProduction","created_at":null}\n'], result)
+
+    def test_csv_chunks(self):
+        result = list(csv_chunks(self.columns, iter(self.partitions)))
+
+        self.assertEqual(['id,name,state,created_at\r\n',
+                          '1,name,Done,2022-12-01\r\n',
+                          '2,name2,InProduction,\r\n'], result)
+
+    @mock.patch('src.app.db.session.execute')
+    def test_export_films_is_lazy(self, mock_execute):
+        with app.test_request_context('/export/films?format=csv'):
+            result = undecorated(export_films)()
+
+        self.assertEqual('text/csv', result.mimetype)
+        self.assertEqual('attachment; filename=films.csv', result.headers['Content-Disposition'])
+        mock_execute.assert_not_called()
+
+    def test_export_films_invalid_format(self):
+        with app.test_request_context('/export/films?format=xml'):
+            result = undecorated(export_films)()
+
+        self.assertEqual(({'errors': [{'message': 'format should be one of: ndjson, csv.',
+                                       'source': "Parameter 'format' in query string."}],
+                           'traceId': result[0].get('traceId')}, 400), result)
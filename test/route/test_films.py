@@ -1,13 +1,19 @@
+from datetime import date
 from unittest import TestCase, mock
 from src.model import User, Role
 from src.model import Film, State
+from src.model.film import film_cache, serialize_film
 from undecorated import undecorated
 
-from src.route import create_film, update_film_by_id, get_film_by_id
+from src.app import app
+from src.route import create_film, update_film_by_id, get_film_by_id, get_films, import_films
+from src.route.films import validate_film_row, import_film_rows
+from sqlalchemy.exc import IntegrityError
 
 class TestFilms(TestCase):
 
     def setUp(self) -> None:
+        film_cache.clear()
         self.user = User(
             username='username',
             email='email',
@@ -16,14 +22,14 @@ class TestFilms(TestCase):
 
         self.film = Film(
             name='name',
-            duration='100',
+            duration=100,
             created_at='created_at',
             state='Done'
         )
 
         self.film_new = Film(
             name='name2',
-            duration='110',
+            duration=110,
             created_at='created_at2',
             state='Done2'
         )
@@ -44,7 +50,7 @@ class TestFilms(TestCase):
     @mock.patch('src.model.user.Role.get_by_name')
     @mock.patch('src.model.User.get_by_id')
     @mock.patch('src.model.User.get_by_username')
-    @mock.patch('flask_restful.reqparse.RequestParser.parse_args')
+    @mock.patch('src.route.schemas.Schema.parse')
     @mock.patch('flask_httpauth.HTTPAuth.current_user')
     def test_create_film(self, mock_request_parser, mock_current_user, mock_get_by_name,
                          mock_get_by_username, mock_get_by_id, mock_save_to_db):
@@ -65,7 +71,7 @@ class TestFilms(TestCase):
     @mock.patch('src.model.Film.get_by_id')
     @mock.patch('src.model.Film.get_by_name')
     @mock.patch('src.model.User.get_by_username')
-    @mock.patch('flask_restful.reqparse.RequestParser.parse_args')
+    @mock.patch('src.route.schemas.Schema.parse')
     def test_update_film_by_id(self, mock_request_parser, mock_get_by_name,
                          mock_get_by_film_name, mock_get_by_username, mock_get_by_film_id, mock_save_to_db):
         mock_get_by_name.return_value = Role(id=1, name='user')
@@ -76,16 +82,65 @@ class TestFilms(TestCase):
         mock_save_to_db.return_value = True
 
         undecorated_update_film_by_id = undecorated(update_film_by_id)
-        result = undecorated_update_film_by_id(1)
+        with app.test_request_context('/film/1', method='PUT'):
+            result = undecorated_update_film_by_id(1)
 
-        self.assertEqual(self.film_new.to_json(), result)
+        self.assertEqual((self.film_new.to_json(), 200, {'ETag': '"None-None"'}), result)
 
+    @mock.patch('src.app.db.session.rollback')
     @mock.patch('src.model.Film.save_to_db')
-    @mock.patch('src.model.user.Role.get_by_name')
+    @mock.patch('src.model.Film.get_by_name')
+    @mock.patch('src.model.Film.get_by_id')
+    @mock.patch('src.route.schemas.Schema.parse')
+    def test_update_film_by_id_name_taken(self, mock_request_parser, mock_get_by_id, mock_get_by_name,
+                                          mock_save_to_db, mock_rollback):
+        mock_request_parser.return_value = Film.to_json(self.film_new)
+        mock_get_by_id.return_value = self.film
+        mock_save_to_db.side_effect = IntegrityError(
+            'UPDATE', {}, Exception(1062, "Duplicate entry 'name2' for key 'film.name'"))
+
+        with app.test_request_context('/film/1', method='PUT'):
+            result = undecorated(update_film_by_id)(1)
+
+        self.assertEqual(({'errors': [{'message': 'Film with such name already exists.',
+                                       'source': "Field 'name' in the request body."}],
+                           'traceId': result[0].get('traceId')}, 400), result)
+        mock_get_by_name.assert_not_called()
+        mock_rollback.assert_called_once_with()
+
     @mock.patch('src.model.Film.get_by_id')
+    def test_update_film_by_id_invalid_body(self, mock_get_by_id):
+        body = {'name': 'name', 'duration': 'long', 'created_at': '2022-12-01'}
+
+        with app.test_request_context('/film/1', method='PUT', json=body):
+            result = undecorated(update_film_by_id)(1)
+
+        self.assertEqual(({'errors': [{'message': 'duration should be a number of minutes.',
+                                       'source': "Field 'duration' in the request body."}],
+                           'traceId': result[0].get('traceId')}, 400), result)
+        mock_get_by_id.assert_not_called()
+
+    @mock.patch('src.model.Film.save_to_db')
+    @mock.patch('src.model.Film.get_by_id')
+    @mock.patch('src.route.schemas.Schema.parse')
+    def test_update_film_by_id_if_match_fail(self, mock_request_parser, mock_get_by_id, mock_save_to_db):
+        mock_request_parser.return_value = Film.to_json(self.film)
+        self.film.id = 1
+        self.film.version = 2
+        mock_get_by_id.return_value = self.film
+
+        with app.test_request_context('/film/1', method='PUT', headers={'If-Match': '"1-1"'}):
+            result = undecorated(update_film_by_id)(1)
+
+        self.assertEqual(412, result[1])
+        mock_save_to_db.assert_not_called()
+
+    @mock.patch('src.model.Film.save_to_db')
+    @mock.patch('src.model.user.Role.get_by_name')
+    @mock.patch('src.model.Film.get_latest')
     @mock.patch('src.model.Film.get_by_name')
     @mock.patch('src.model.User.get_by_username')
-    @mock.patch('flask_restful.reqparse.RequestParser.parse_args')
+    @mock.patch('src.route.schemas.Schema.parse')
     def test_get_film_by_id(self, mock_request_parser, mock_get_by_name,
                          mock_get_by_film_name, mock_get_by_username, mock_get_by_film_id, mock_save_to_db):
         mock_get_by_name.return_value = Role(id=1, name='user')
@@ -95,8 +150,193 @@ class TestFilms(TestCase):
         mock_get_by_username.return_value = self.film_new
         mock_save_to_db.return_value = True
 
+        self.film_new.id = 1
+        self.film_new.version = 2
+
         undecorated_update_film_by_id = undecorated(get_film_by_id)
-        result = undecorated_update_film_by_id(1)
+        with app.test_request_context('/film/1'):
+            result = undecorated_update_film_by_id(1)
+
+        self.assertEqual((self.film_new.to_json(), 200, {'ETag': '"1-2"'}), result)
+
+    @mock.patch('src.model.Film.get_latest')
+    def test_get_film_by_id_cached(self, mock_get_latest):
+        self.film.id = 1
+        mock_get_latest.return_value = self.film
+
+        with app.test_request_context('/film/1'):
+            first = undecorated(get_film_by_id)('1')
+            second = undecorated(get_film_by_id)(1)
+
+        self.assertEqual(self.film.to_json(), first[0])
+        self.assertEqual(first, second)
+        mock_get_latest.assert_called_once_with(1)
+
+    @mock.patch('src.model.Film.get_latest')
+    def test_get_film_by_id_not_modified(self, mock_get_latest):
+        self.film.id = 1
+        self.film.version = 2
+        mock_get_latest.return_value = self.film
+
+        with app.test_request_context('/film/1', headers={'If-None-Match': 'W/"1-1", "1-2"'}):
+            result = undecorated(get_film_by_id)(1)
+
+        self.assertEqual(304, result.status_code)
+        self.assertEqual(b'', result.get_data())
+
+    @mock.patch('src.app.db.session.commit')
+    @mock.patch('src.app.db.session.add')
+    @mock.patch('src.model.Film.get_latest')
+    def test_get_film_by_id_after_save(self, mock_get_latest, mock_add, mock_commit):
+        self.film.id = 1
+        mock_get_latest.return_value = self.film
+        with app.test_request_context('/film/1'):
+            undecorated(get_film_by_id)(1)
+
+            self.film.name = 'renamed'
+            self.film.save_to_db()
+            result = undecorated(get_film_by_id)(1)
+
+        self.assertEqual('renamed', result[0]['name'])
+        self.assertEqual(2, mock_get_latest.call_count)
+
+    @mock.patch('src.model.Film.get_latest')
+    def test_get_film_by_id_not_found(self, mock_get_latest):
+        mock_get_latest.return_value = None
+
+        result = undecorated(get_film_by_id)('abc')
+
+        self.assertEqual(404, result[1])
+        mock_get_latest.assert_not_called()
+
+    @mock.patch('src.model.Film.get_page')
+    def test_get_films(self, mock_get_page):
+        self.film.id = 1
+        self.film_new.id = 2
+        mock_get_page.return_value = [self.film, self.film_new]
+
+        with app.test_request_context('/films?after=0&limit=1&state=Done'):
+            result = undecorated(get_films)()
+
+        self.assertEqual({'films': [self.film.to_json()], 'next_cursor': 1}, result)
+        mock_get_page.assert_called_once_with(0, 2, 'Done', None, None)
+
+    @mock.patch('src.model.Film.get_page')
+    def test_get_films_by_created_at(self, mock_get_page):
+        self.film.id = 7
+        self.film.created_at = date(2022, 1, 3)
+        mock_get_page.return_value = [self.film, self.film_new]
+
+        with app.test_request_context('/films?after=2022-01-02,9&limit=1&created_from=2022-01-01'):
+            result = undecorated(get_films)()
+
+        self.assertEqual({'films': [serialize_film(self.film)], 'next_cursor': '2022-01-03,7'}, result)
+        mock_get_page.assert_called_once_with((date(2022, 1, 2), 9), 2, None, date(2022, 1, 1), None)
+
+    def test_get_films_by_created_at_invalid_cursor(self):
+        with app.test_request_context('/films?after=5&created_to=2022-01-01'):
+            result = undecorated(get_films)()
+
+        self.assertEqual(({'errors': [{'message': 'after should be a cursor returned as next_cursor.',
+                                       'source': "Parameter 'after' in query string."}],
+                           'traceId': result[0].get('traceId')}, 400), result)
+
+    @mock.patch('src.model.Film.get_page')
+    def test_get_films_last_page(self, mock_get_page):
+        mock_get_page.return_value = [self.film]
+
+        with app.test_request_context('/films'):
+            result = undecorated(get_films)()
+
+        self.assertEqual({'films': [self.film.to_json()], 'next_cursor': None}, result)
+
+    def test_get_films_invalid_limit(self):
+        with app.test_request_context('/films?limit=100000'):
+            result = undecorated(get_films)()
+
+        self.assertEqual(({'errors': [{'message': 'limit should be between 1 and 500.',
+                                       'source': "Parameter 'limit' in query string."}],
+                           'traceId': result[0].get('traceId')}, 400), result)
+
+    def test_get_films_negative_cursor(self):
+        with app.test_request_context('/films?after=-1'):
+            result = undecorated(get_films)()
+
+        self.assertEqual(({'errors': [{'message': 'after should be at least 0.',
+                                       'source': "Parameter 'after' in query string."}],
+                           'traceId': result[0].get('traceId')}, 400), result)
+
+    def test_get_films_invalid_state(self):
+        with app.test_request_context('/films?state=Lost'):
+            result = undecorated(get_films)()
+
+        self.assertEqual(400, result[1])
+
+    def test_validate_film_row(self):
+        result = validate_film_row({'name': 'name', 'duration': 100, 'created_at': '2022-12-01'})
+
+        self.assertEqual(({'name': 'name', 'duration': 100, 'state': State.Done,
+                           'created_at': date(2022, 12, 1)}, None), result)
+
+    def test_validate_film_row_invalid(self):
+        self.assertEqual((None, ('Row should be a JSON object.', 'row')), validate_film_row(None))
+        self.assertEqual('duration', validate_film_row({'name': 'name'})[1][1])
+        self.assertEqual('state', validate_film_row({'name': 'name', 'duration': '1', 'state': 'Lost'})[1][1])
+        self.assertEqual('created_at', validate_film_row({'name': 'name', 'duration': '1',
+                                                          'created_at': '01.12.2022'})[1][1])
+
+    @mock.patch('src.model.Film.insert_many')
+    @mock.patch('src.model.Film.get_existing_names')
+    def test_import_film_rows(self, mock_get_existing_names, mock_insert_many):
+        mock_get_existing_names.return_value = {'taken'}
+        rows = [{'name': 'new', 'duration': '1', 'created_at': '2022-12-01'},
+                {'name': 'taken', 'duration': '1', 'created_at': '2022-12-01'},
+                {'name': 'new', 'duration': '1', 'created_at': '2022-12-01'},
+                {'name': 'other', 'duration': '1', 'created_at': '2022-12-01'}]
+
+        result = import_film_rows(rows, batch_size=3)
+
+        self.assertEqual([(0, 'created'), (1, 'conflict'), (2, 'conflict'), (3, 'created')],
+                         sorted((row['index'], row['status']) for row in result))
+        self.assertEqual(2, mock_insert_many.call_count)
+
+    @mock.patch('src.app.db.session.commit')
+    @mock.patch('src.app.db.session.rollback')
+    @mock.patch('src.model.Film.insert_one')
+    @mock.patch('src.model.Film.insert_many')
+    @mock.patch('src.model.Film.get_existing_names')
+    def test_import_film_rows_concurrent_conflict(self, mock_get_existing_names, mock_insert_many,
+                                                  mock_insert_one, mock_rollback, mock_commit):
+        mock_get_existing_names.return_value = set()
+        mock_insert_many.side_effect = IntegrityError('INSERT', {}, Exception())
+        mock_insert_one.side_effect = [False, True]
+        rows = [{'name': 'raced', 'duration': '1', 'created_at': '2022-12-01'},
+                {'name': 'new', 'duration': '1', 'created_at': '2022-12-01'}]
+
+        result = import_film_rows(rows, batch_size=10)
+
+        self.assertEqual(['conflict', 'created'], [row['status'] for row in result])
+        mock_rollback.assert_called_once_with()
+        mock_commit.assert_called_once_with()
+
+    def test_import_films_invalid_body(self):
+        with app.test_request_context('/films/bulk', method='POST', json={'name': 'name'}):
+            result = undecorated(import_films)()
+
+        self.assertEqual(({'errors': [{'message': 'Request body should be a JSON array or NDJSON.',
+                                       'source': 'Request body.'}],
+                           'traceId': result[0].get('traceId')}, 400), result)
+
+    @mock.patch('src.model.Film.insert_many')
+    @mock.patch('src.model.Film.get_existing_names')
+    def test_import_films_ndjson(self, mock_get_existing_names, mock_insert_many):
+        mock_get_existing_names.return_value = set()
+        body = '{"name": "name", "duration": "1", "created_at": "2022-12-01"}\n{broken\n'
 
-        self.assertEqual(self.film_new.to_json(), result)
+        with app.test_request_context('/films/bulk', method='POST', data=body,
+                                      content_type='application/x-ndjson'):
+            result = undecorated(import_films)()
 
+        self.assertEqual(1, result[0]['created'])
+        self.assertEqual(1, result[0]['failed'])
+        self.assertEqual('invalid', result[0]['results'][1]['status'])
@@ -0,0 +1,94 @@
+from collections import namedtuple
+from datetime import datetime
+from unittest import TestCase, mock
+from undecorated import undecorated
+
+from src.app import app
+from src.route import get_schedule, get_film_schedule, check_screenings
+from src.model.scheduling import Screening
+
+Row = namedtuple('Row', ['id', 'film_id', 'film_name', 'date'])
+
+
+class TestSchedule(TestCase):
+
+    def setUp(self) -> None:
+        self.rows = [Row(1, 1, 'name', datetime(2022, 12, 1, 10)),
+                     Row(2, 1, 'name', datetime(2022, 12, 1, 13))]
+
+    @mock.patch('src.model.film.Schedule.get_between')
+    def test_get_schedule(self, mock_get_between):
+        mock_get_between.return_value = self.rows
+
+        with app.test_request_context('/schedule?from=2022-12-01T00:00:00&to=2022-12-02T00:00:00&limit=1'):
+            result = undecorated(get_schedule)()
+
+        self.assertEqual({'screenings': [{'id': 1, 'film_id': 1, 'film_name': 'name',
+                                          'date': datetime(2022, 12, 1, 10)}],
+                          'next_cursor': '2022-12-01T10:00:00,1'}, result)
+        mock_get_between.assert_called_once_with(datetime(2022, 12, 1), datetime(2022, 12, 2), None, 2)
+
+    @mock.patch('src.model.film.Schedule.get_between')
+    def test_get_schedule_next_page(self, mock_get_between):
+        mock_get_between.return_value = []
+
+        with app.test_request_context('/schedule?from=2022-12-01T00:00:00&to=2022-12-02T00:00:00'
+                                      '&after=2022-12-01T10:00:00,1'):
+            undecorated(get_schedule)()
+
+        self.assertEqual((datetime(2022, 12, 1, 10), 1), mock_get_between.call_args[0][2])
+
+    def test_get_schedule_invalid_range(self):
+        with app.test_request_context('/schedule?from=2022-12-02T00:00:00&to=2022-12-01T00:00:00'):
+            result = undecorated(get_schedule)()
+
+        self.assertEqual(({'errors': [{'message': 'to should be later than from.',
+                                       'source': "Parameter 'to' in query string."}],
+                           'traceId': result[0].get('traceId')}, 400), result)
+
+    def test_get_schedule_invalid_cursor(self):
+        with app.test_request_context('/schedule?from=2022-12-01T00:00:00&to=2022-12-02T00:00:00&after=1'):
+            result = undecorated(get_schedule)()
+
+        self.assertEqual(400, result[1])
+
+    @mock.patch('src.model.film.Schedule.get_next_for_film')
+    def test_get_film_schedule(self, mock_get_next_for_film):
+        mock_get_next_for_film.return_value = self.rows
+
+        with app.test_request_context('/film/1/schedule?from=2022-12-01T00:00:00&limit=2'):
+            result = undecorated(get_film_schedule)(1)
+
+        self.assertEqual(2, len(result['screenings']))
+        mock_get_next_for_film.assert_called_once_with(1, datetime(2022, 12, 1), 2)
+
+    @mock.patch('src.route.schedule.check_schedule')
+    def test_check_screenings(self, mock_check_schedule):
+        existing = Screening(datetime(2022, 12, 1, 10), datetime(2022, 12, 1, 12), 1, schedule_id=3)
+        proposed = Screening(datetime(2022, 12, 1, 11), datetime(2022, 12, 1, 13), 1, index=0)
+        mock_check_schedule.return_value = ([(existing, proposed)], [])
+
+        with app.test_request_context('/schedule/check', method='POST',
+                                      json=[{'film_id': 1, 'date': '2022-12-01T11:00:00'}]):
+            result = undecorated(check_screenings)()
+
+        self.assertEqual({'ok': False, 'conflicts': [[existing.to_json(), proposed.to_json()]]}, result)
+        mock_check_schedule.assert_called_once_with([(1, datetime(2022, 12, 1, 11))])
+
+    def test_check_screenings_invalid_date(self):
+        with app.test_request_context('/schedule/check', method='POST', json=[{'film_id': 1, 'date': 'soon'}]):
+            result = undecorated(check_screenings)()
+
+        self.assertEqual(({'errors': [{'message': 'date should be a date and time in YYYY-MM-DDTHH:MM:SS format.',
+                                       'source': "Field 'date' in row 0."}],
+                           'traceId': result[0].get('traceId')}, 400), result)
+
+    @mock.patch('src.route.schedule.check_schedule')
+    def test_check_screenings_unknown_film(self, mock_check_schedule):
+        mock_check_schedule.return_value = ([], [5])
+
+        with app.test_request_context('/schedule/check', method='POST',
+                                      json=[{'film_id': 5, 'date': '2022-12-01T11:00:00'}]):
+            result = undecorated(check_screenings)()
+
+        self.assertEqual(404, result[1])
@@ -0,0 +1,70 @@
+from datetime import date
+from unittest import TestCase
+
+from src.app import app
+from src.model import State
+from src.route.films import FILM_SCHEMA
+from src.route.users import USER_SCHEMA
+from src.route.schemas import BodyFieldError
+
+
+class TestSchemas(TestCase):
+
+    def setUp(self) -> None:
+        self.film = {'name': 'name', 'duration': '1h 40m', 'state': 'InProduction', 'created_at': '2022-12-01'}
+
+    def test_validate_coerces(self):
+        self.assertEqual({'name': 'name', 'duration': 100, 'state': State.InProduction,
+                          'created_at': date(2022, 12, 1)}, FILM_SCHEMA.validate(self.film))
+
+    def test_validate_default(self):
+        for state in (None, ''):
+            self.film['state'] = state
+
+            self.assertIs(State.Done, FILM_SCHEMA.validate(self.film)['state'])
+
+    def test_validate_missing(self):
+        del self.film['created_at']
+
+        with self.assertRaises(BodyFieldError) as raised:
+            FILM_SCHEMA.validate(self.film)
+
+        self.assertEqual('created_at', raised.exception.name)
+        self.assertEqual('created_at should be a date in YYYY-MM-DD format.', raised.exception.message)
+
+    def test_validate_wrong_type(self):
+        self.film['state'] = 1
+
+        with self.assertRaises(BodyFieldError) as raised:
+            FILM_SCHEMA.validate(self.film)
+
+        self.assertEqual('state should be one of: Done, InProduction.', raised.exception.message)
+
+    def test_blank_text(self):
+        with self.assertRaises(BodyFieldError) as raised:
+            USER_SCHEMA.validate({'username': '  ', 'email': 'e@mail', 'password': 'password'})
+
+        self.assertEqual('username cannot be blank', raised.exception.message)
+
+    def test_validate_row(self):
+        self.assertEqual((None, ('Row should be a JSON object.', 'row')), FILM_SCHEMA.validate_row([]))
+        self.assertEqual((None, ('name should be at most 45 characters long.', 'name')),
+                         FILM_SCHEMA.validate_row(dict(self.film, name='n' * 46)))
+
+    def test_parse_json(self):
+        with app.test_request_context('/film/1', method='POST', json=self.film):
+            self.assertEqual(100, FILM_SCHEMA.parse()['duration'])
+
+    def test_parse_form(self):
+        with app.test_request_context('/film/1', method='POST', data=self.film):
+            self.assertEqual(State.InProduction, FILM_SCHEMA.parse()['state'])
+
+    def test_parse_not_an_object(self):
+        with app.test_request_context('/film/1', method='POST', json=[self.film]):
+            with self.assertRaises(BodyFieldError) as raised:
+                FILM_SCHEMA.parse()
+
+        result = raised.exception.to_response()
+        self.assertEqual(({'errors': [{'message': 'Request body should be a JSON object.',
+                                       'source': "Field 'body' in the request body."}],
+                           'traceId': result[0]['traceId']}, 400), result)
@@ -1,7 +1,16 @@
+import os
+from tempfile import TemporaryDirectory
 from src.model import User, Role
+from src.model.user import Principal
 from unittest import TestCase, mock
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
 from undecorated import undecorated
-from src.route import create_user, get_user_by_id, get_user_by_username, update_user_by_id, delete_user_by_id
+from src.app import app
+from src.route import create_user, login, get_user_by_id, get_user_by_username, update_user_by_id, delete_user_by_id, \
+    get_users
+from src.route.users import validate_user_row, provision_user_rows
+from src.model.hashing import HashingExecutor
 
 class TestUsers(TestCase):
 
@@ -31,72 +40,111 @@ class TestUsers(TestCase):
             'email': 'email'
         }
 
-    @mock.patch('src.model.user.User.save_to_db')
-    @mock.patch('src.model.user.Role.get_by_name')
+    @mock.patch('src.model.user.User.save_with_role_ids')
+    @mock.patch('src.model.user.RoleRegistry.id_of')
     @mock.patch('src.model.user.User.get_by_username')
     @mock.patch('src.model.user.User.generate_hash')
-    @mock.patch('flask_restful.reqparse.RequestParser.parse_args')
-    def test_create_user(self, mock_request_parser, mock_generate_hash, mock_get_by_username, mock_get_by_name, mock_save_to_db):
+    @mock.patch('src.route.schemas.Schema.parse')
+    def test_create_user(self, mock_request_parser, mock_generate_hash, mock_get_by_username, mock_id_of,
+                         mock_save_with_role_ids):
         mock_request_parser.return_value = self.user_json_create
         mock_generate_hash.return_value = 'password'
         mock_get_by_username.return_value = False
-        mock_get_by_name.return_value = Role(id=1, name='user')
-        mock_save_to_db.return_value = True
+        mock_id_of.return_value = 1
+        mock_save_with_role_ids.return_value = None
 
         result = create_user()
 
         self.assertEqual(({'message': 'User was successfully created'}, 200), result)
+        mock_id_of.assert_called_once_with('user')
+        mock_save_with_role_ids.assert_called_once_with([1])
 
     @mock.patch('src.model.user.User.generate_hash')
-    @mock.patch('flask_restful.reqparse.RequestParser.parse_args')
-    def test_create_user_with_email_fail(self, mock_request_parser, mock_generate_hash):
+    def test_create_user_with_email_fail(self, mock_generate_hash):
         self.user_json_create['email'] = 'invalid'
 
-        mock_request_parser.return_value = self.user_json_create
-        mock_generate_hash.return_value = 'password'
-
-        result = create_user()
+        with app.test_request_context('/user/create', method='POST', json=self.user_json_create):
+            result = create_user()
 
         self.assertEqual(({'errors': [{'message': 'Please, enter valid email address.',
                                        'source': "Field 'email' in the request body."}],
                            'traceId': result[0].get('traceId')}, 400), result)
 
     @mock.patch('src.model.user.User.generate_hash')
-    @mock.patch('flask_restful.reqparse.RequestParser.parse_args')
-    def test_create_user_with_password_fail(self, mock_request_parser, mock_generate_hash):
+    def test_create_user_with_password_fail(self, mock_generate_hash):
         self.user_json_create['password'] = 'bad'
 
-        mock_request_parser.return_value = self.user_json_create
-        mock_generate_hash.return_value = 'password'
-
-        result = create_user()
+        with app.test_request_context('/user/create', method='POST', json=self.user_json_create):
+            result = create_user()
 
         self.assertEqual(({'errors': [{'message': 'Password should consist of at least 8 symbols.',
                                        'source': "Field 'password' in the request body."}],
                            'traceId': result[0].get('traceId')}, 400), result)
+        mock_generate_hash.assert_not_called()
 
-    @mock.patch('src.model.user.User.get_by_username')
+    @mock.patch('src.app.db.session.rollback')
+    @mock.patch('src.model.user.User.save_with_role_ids')
+    @mock.patch('src.model.user.RoleRegistry.id_of')
     @mock.patch('src.model.user.User.generate_hash')
-    @mock.patch('flask_restful.reqparse.RequestParser.parse_args')
-    def test_create_user_with_username_fail(self, mock_request_parser, mock_generate_hash, mock_get_by_username):
+    @mock.patch('src.route.schemas.Schema.parse')
+    def test_create_user_with_username_fail(self, mock_request_parser, mock_generate_hash, mock_id_of,
+                                            mock_save_with_role_ids, mock_rollback):
         mock_request_parser.return_value = self.user_json_create
         mock_generate_hash.return_value = 'password'
-        mock_get_by_username.return_value = True
+        mock_id_of.return_value = 1
+        mock_save_with_role_ids.side_effect = IntegrityError(
+            'INSERT', {}, Exception(1062, "Duplicate entry 'pepega2' for key 'user.username'"))
 
         result = create_user()
 
         self.assertEqual(({'errors': [{'message': 'User with such username already exists.',
                                        'source': "Field 'username' in the request body."}],
                            'traceId': result[0].get('traceId')}, 400), result)
+        mock_rollback.assert_called_once_with()
+
+    @mock.patch('src.app.db.session.rollback')
+    @mock.patch('src.model.user.User.save_with_role_ids')
+    @mock.patch('src.model.user.RoleRegistry.id_of')
+    @mock.patch('src.model.user.User.generate_hash')
+    @mock.patch('src.route.schemas.Schema.parse')
+    def test_create_user_with_taken_email_fail(self, mock_request_parser, mock_generate_hash, mock_id_of,
+                                               mock_save_with_role_ids, mock_rollback):
+        mock_request_parser.return_value = self.user_json_create
+        mock_generate_hash.return_value = 'password'
+        mock_id_of.return_value = 1
+        mock_save_with_role_ids.side_effect = IntegrityError(
+            'INSERT', {}, Exception('UNIQUE constraint failed: user.email'))
+
+        result = create_user()
+
+        self.assertEqual(({'errors': [{'message': 'User with such email already exists.',
+                                       'source': "Field 'email' in the request body."}],
+                           'traceId': result[0].get('traceId')}, 400), result)
 
     @mock.patch('src.model.user.User.get_by_id')
     def test_get_user_by_id(self, mock_get_user_by_id):
+        self.user.version = 3
         mock_get_user_by_id.return_value = self.user
 
         undecorated_get_user_by_id = undecorated(get_user_by_id)
-        result = undecorated_get_user_by_id(1)
+        with app.test_request_context('/user/1'):
+            result = undecorated_get_user_by_id(1)
 
-        self.assertEqual(self.get_user_json, result)
+        self.assertEqual((self.get_user_json, 200, {'ETag': '"None-3"'}), result)
+
+    @mock.patch('src.model.user.User.to_json')
+    @mock.patch('src.model.user.User.get_by_id')
+    def test_get_user_by_id_not_modified(self, mock_get_user_by_id, mock_to_json):
+        self.user.id = 1
+        self.user.version = 3
+        mock_get_user_by_id.return_value = self.user
+
+        with app.test_request_context('/user/1', headers={'If-None-Match': '"1-3"'}):
+            result = undecorated(get_user_by_id)(1)
+
+        self.assertEqual(304, result.status_code)
+        self.assertEqual('"1-3"', result.headers['ETag'])
+        mock_to_json.assert_not_called()
 
     @mock.patch('src.model.user.User.get_by_id')
     def test_get_user_by_id_fail(self, mock_get_user_by_id):
@@ -134,41 +182,84 @@ class TestUsers(TestCase):
     @mock.patch('src.model.user.Role.get_by_name')
     @mock.patch('src.model.user.User.get_by_username')
     @mock.patch('src.model.user.User.get_by_email')
-    @mock.patch('flask_httpauth.HTTPAuth.current_user')
-    @mock.patch('flask_restful.reqparse.RequestParser.parse_args')
+    @mock.patch('flask_httpauth.MultiAuth.current_user')
+    @mock.patch('src.route.schemas.Schema.parse')
     def test_update_user_by_id(self, mock_request_parser, mock_current_user, mock_get_by_username,
                                mock_get_by_email, mock_get_by_name, mock_get_by_id, mock_save_to_db):
-        mock_current_user.return_value = 'username'
+        mock_current_user.return_value = Principal(1, 'username', ('user', 'admin'))
         mock_request_parser.return_value = self.update_user_json
         admin = Role(id=1, name='admin')
         self.user.roles.append(admin)
         mock_get_by_name.return_value = admin
         mock_get_by_username.side_effect = [self.user, None]
-        mock_get_by_email.side_effect = [self.user, None]
+        mock_get_by_email.return_value = None
         mock_get_by_id.return_value = self.user
         mock_save_to_db.return_value = True
 
         undecorated_update_user_by_id = undecorated(update_user_by_id)
-        result = undecorated_update_user_by_id(1)          #here
+        with app.test_request_context('/user/1', method='PUT'):
+            result = undecorated_update_user_by_id(1)          #here
 
         self.get_user_json['username'] = 'username_new'
 
-        self.assertEqual({'email': 'email',
-                             'id': None,
-                             'password': 'password',
-                             'roles': ['admin'],
-                             'username': 'username_new'}, result)
+        self.assertEqual(({'email': 'email',
+                              'id': None,
+                              'password': 'password',
+                              'roles': ['admin'],
+                              'username': 'username_new'}, 200, {'ETag': '"None-None"'}), result)
+
+    @mock.patch('src.model.user.User.save_to_db')
+    @mock.patch('src.model.user.User.get_by_id')
+    @mock.patch('flask_httpauth.MultiAuth.current_user')
+    @mock.patch('src.route.schemas.Schema.parse')
+    def test_update_user_by_id_if_match_fail(self, mock_request_parser, mock_current_user, mock_get_by_id,
+                                             mock_save_to_db):
+        mock_current_user.return_value = Principal(1, 'username', ('user',))
+        mock_request_parser.return_value = self.update_user_json
+        self.user.id = 1
+        self.user.version = 4
+        mock_get_by_id.return_value = self.user
+
+        with app.test_request_context('/user/1', method='PUT', headers={'If-Match': '"1-3"'}):
+            result = undecorated(update_user_by_id)(1)
+
+        self.assertEqual(({'errors': [{'message': 'Resource was modified since it was fetched.',
+                                       'source': "Header 'If-Match'."}],
+                           'traceId': result[0].get('traceId')}, 412), result)
+        mock_save_to_db.assert_not_called()
+
+    @mock.patch('src.model.user.User.save_to_db')
+    @mock.patch('src.model.user.User.get_by_username')
+    @mock.patch('src.model.user.User.get_by_id')
+    @mock.patch('flask_httpauth.MultiAuth.current_user')
+    @mock.patch('src.route.schemas.Schema.parse')
+    def test_update_user_by_id_concurrent_update(self, mock_request_parser, mock_current_user, mock_get_by_id,
+                                                 mock_get_by_username, mock_save_to_db):
+        mock_current_user.return_value = Principal(1, 'username', ('user',))
+        mock_request_parser.return_value = self.update_user_json
+        self.user.id = 1
+        self.user.version = 3
+        mock_get_by_id.return_value = self.user
+        mock_get_by_username.return_value = None
+        mock_save_to_db.side_effect = StaleDataError()
+
+        with app.test_request_context('/user/1', method='PUT', headers={'If-Match': '"1-3"'}):
+            with mock.patch('src.app.db.session.rollback') as mock_rollback:
+                result = undecorated(update_user_by_id)(1)
+
+        self.assertEqual(412, result[1])
+        mock_rollback.assert_called_once_with()
 
     @mock.patch('src.model.user.User.save_to_db')
     @mock.patch('src.model.user.User.get_by_id')
     @mock.patch('src.model.user.Role.get_by_name')
     @mock.patch('src.model.user.User.get_by_username')
     @mock.patch('src.model.user.User.get_by_email')
-    @mock.patch('flask_httpauth.HTTPAuth.current_user')
-    @mock.patch('flask_restful.reqparse.RequestParser.parse_args')
+    @mock.patch('flask_httpauth.MultiAuth.current_user')
+    @mock.patch('src.route.schemas.Schema.parse')
     def test_update_user_by_id_username_fail(self, mock_request_parser, mock_current_user, mock_get_by_username,
                                mock_get_by_email, mock_get_by_name, mock_get_by_id, mock_save_to_db):
-        mock_current_user.return_value = 'username'
+        mock_current_user.return_value = Principal(1, 'username', ('user', 'admin'))
         mock_request_parser.return_value = self.update_user_json
         admin = Role(id=35151454, name='admin')
         self.user.roles.append(admin)
@@ -176,13 +267,134 @@ class TestUsers(TestCase):
         mock_get_by_username.return_value = self.user
         mock_get_by_email.return_value = self.user
         mock_get_by_id.return_value = self.user
-        mock_save_to_db.return_value = True
+        mock_save_to_db.side_effect = IntegrityError(
+            'UPDATE', {}, Exception(1062, "Duplicate entry 'username_new' for key 'username'"))
 
         undecorated_update_user_by_id = undecorated(update_user_by_id)
-        result = undecorated_update_user_by_id(1)          #here
+        with app.test_request_context('/user/1', method='PUT'):
+            with mock.patch('src.app.db.session.rollback'):
+                result = undecorated_update_user_by_id(1)          #here
 
         self.get_user_json['username'] = 'username_new'
 
         self.assertEqual(({'errors': [{'message': 'User with such username already exists.',
                                    'source': "Field \'username\' in the request body."}],
-                           'traceId': result[0].get('traceId')}, 404), result)
\ No newline at end of file
+                           'traceId': result[0].get('traceId')}, 400), result)
+        mock_get_by_id.assert_called_once_with(1)
+        mock_get_by_email.assert_not_called()
+
+    @mock.patch('src.model.user.User.get_by_id')
+    @mock.patch('flask_httpauth.MultiAuth.current_user')
+    def test_update_user_by_id_forbidden(self, mock_current_user, mock_get_by_id):
+        mock_current_user.return_value = Principal(2, 'other', ('user',))
+        mock_get_by_id.return_value = self.user
+
+        undecorated_update_user_by_id = undecorated(update_user_by_id)
+        with app.test_request_context('/user/1', method='PUT', json={'username': 'name', 'email': 'e@mail'}):
+            result = undecorated_update_user_by_id(1)
+
+        self.assertEqual(({'errors': [{'message': 'You can only update your own account.',
+                                       'source': "Field 'userId' in path parameters."}],
+                           'traceId': result[0].get('traceId')}, 403), result)
+
+    @mock.patch('src.route.users.revoke_tokens')
+    @mock.patch('src.model.user.credential_cache.forget')
+    @mock.patch('src.model.user.User.delete_by_id')
+    @mock.patch('src.model.user.User.get_by_id')
+    def test_delete_user_by_id(self, mock_get_by_id, mock_delete_by_id, mock_forget, mock_revoke_tokens):
+        user = mock.Mock(id=1, username='username')
+        mock_get_by_id.return_value = user
+
+        def delete_and_expire(user_id):
+            # the commit expires user and its row is gone, so its attributes cannot be loaded
+            del user.id, user.username
+            return {'id': 1, 'username': 'username'}
+
+        mock_delete_by_id.side_effect = delete_and_expire
+
+        result = undecorated(delete_user_by_id)(1)
+
+        self.assertEqual({'id': 1, 'username': 'username'}, result)
+        mock_delete_by_id.assert_called_once_with(1)
+        mock_forget.assert_called_once_with('username')
+        mock_revoke_tokens.assert_called_once_with(1)
+
+    @mock.patch('src.route.users.issue_token')
+    @mock.patch('flask_httpauth.HTTPAuth.current_user')
+    def test_login(self, mock_current_user, mock_issue_token):
+        principal = Principal(1, 'username', ('user',))
+        mock_current_user.return_value = principal
+        mock_issue_token.return_value = 'token'
+
+        undecorated_login = undecorated(login)
+        result = undecorated_login()
+
+        self.assertEqual(({'token': 'token', 'expires_in': 900}, 200), result)
+        mock_issue_token.assert_called_once_with(principal)
+
+    @mock.patch('src.model.user.RoleRegistry.names')
+    @mock.patch('src.model.user.User.get_role_ids')
+    @mock.patch('src.model.user.User.get_page')
+    def test_get_users(self, mock_get_page, mock_get_role_ids, mock_names):
+        self.user.id = 1
+        other = User(id=2, username='other', email='other', password='password')
+        mock_get_page.return_value = [self.user, other]
+        mock_get_role_ids.return_value = {1: [1]}
+        mock_names.return_value = ('user',)
+
+        with app.test_request_context('/users?limit=1'):
+            result = undecorated(get_users)()
+
+        self.get_user_json['id'] = 1
+        self.get_user_json['roles'] = ['user']
+        del self.get_user_json['password']
+        self.assertEqual({'users': [self.get_user_json], 'next_cursor': 1}, result)
+        mock_get_page.assert_called_once_with(None, 2)
+        mock_get_role_ids.assert_called_once_with([1])
+
+    def test_validate_user_row(self):
+        result = validate_user_row(self.user_json_create)
+
+        self.assertEqual((self.user_json_create, None), result)
+
+    def test_validate_user_row_invalid(self):
+        self.assertEqual((None, ('Row should be a JSON object.', 'row')), validate_user_row([]))
+        self.assertEqual('email', validate_user_row(dict(self.user_json_create, email='invalid'))[1][1])
+        self.assertEqual('password', validate_user_row(dict(self.user_json_create, password='bad'))[1][1])
+
+    @mock.patch('src.model.user.User.insert_many')
+    @mock.patch('src.route.users.hash_passwords')
+    @mock.patch('src.model.user.User.get_existing')
+    @mock.patch('src.model.user.RoleRegistry.id_of')
+    def test_provision_user_rows(self, mock_id_of, mock_get_existing, mock_hash_passwords, mock_insert_many):
+        mock_id_of.return_value = 1
+        mock_get_existing.return_value = ({'taken'}, set())
+        mock_hash_passwords.side_effect = lambda passwords, executor: ['hash'] * len(passwords)
+        rows = [dict(self.user_json_create),
+                dict(self.user_json_create, username='taken', email='taken@gmail.com'),
+                dict(self.user_json_create, username='other'),
+                dict(self.user_json_create, password='bad')]
+
+        executor = HashingExecutor(workers=0, queue_size=0, timeout=1)
+
+        result = provision_user_rows(rows, batch_size=10, executor=executor)
+
+        self.assertEqual(['created', 'conflict', 'conflict', 'invalid'],
+                         [row['status'] for row in sorted(result, key=lambda row: row['index'])])
+        mock_hash_passwords.assert_called_once_with(['password'], executor)
+        mock_insert_many.assert_called_once_with([{'username': 'pepega2', 'email': 'pepega2k@gmail.com',
+                                                   'password': 'hash'}], 1)
+
+    @mock.patch('src.route.users.provision_user_rows')
+    def test_provision_users_command(self, mock_provision_user_rows):
+        mock_provision_user_rows.return_value = [{'index': 0, 'status': 'created'}]
+        runner = app.test_cli_runner()
+
+        with TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'users.ndjson')
+            with open(path, 'w') as source:
+                source.write('{}\n')
+            result = runner.invoke(args=['users', 'provision', path, '--workers', '2'])
+
+        self.assertIn('1 created, 0 failed', result.output)
+        self.assertEqual(2, mock_provision_user_rows.call_args[0][2].workers)
@@ -0,0 +1,178 @@
+import asyncio
+import json
+import os
+import tempfile
+from base64 import b64encode
+from datetime import date
+from unittest import TestCase, mock, skipIf
+
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
+
+from src.app import db
+from src.model import Film, Role, State, User, issue_token
+from src.model.user import Principal, UsersRoles, credential_cache
+
+try:
+    import aiosqlite
+except ImportError:
+    aiosqlite = None
+
+
+def call(app, path, headers=None, method='GET'):
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {'type': 'http', 'method': method, 'path': path,
+             'headers': [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()]}
+    asyncio.run(app(scope, receive, send))
+
+    start, body = messages
+    return start['status'], {name.decode(): value.decode() for name, value in start['headers']}, body['body']
+
+
+@skipIf(aiosqlite is None, 'aiosqlite is not installed')
+class TestReadApp(TestCase):
+
+    def setUp(self) -> None:
+        from sqlalchemy.ext.asyncio import create_async_engine
+        from src.asgi import ReadApp
+
+        handle, self.path = tempfile.mkstemp(suffix='.db')
+        os.close(handle)
+        engine = create_engine('sqlite:///' + self.path)
+        db.metadata.create_all(engine)
+        with engine.begin() as connection:
+            connection.execute(Role.__table__.insert(), [{'id': 1, 'name': 'user'}, {'id': 2, 'name': 'admin'}])
+            connection.execute(User.__table__.insert(), [{'id': 1, 'username': 'username', 'email': 'e@mail',
+                                                          'password': 'hash', 'version': 1}])
+            connection.execute(UsersRoles.__table__.insert(), [{'user_id': 1, 'role_id': 1},
+                                                               {'user_id': 1, 'role_id': 2}])
+            connection.execute(Film.__table__.insert(), [{'id': 1, 'name': 'name', 'duration': 100,
+                                                          'state': State.Done, 'created_at': date(2022, 12, 1),
+                                                          'version': 3}])
+        engine.dispose()
+
+        self.app = ReadApp(create_async_engine('sqlite+aiosqlite:///' + self.path, poolclass=NullPool))
+        self.headers = {'Authorization': 'Bearer ' + issue_token(Principal(1, 'username', ('user',)))}
+        credential_cache.clear()
+
+    def tearDown(self) -> None:
+        os.remove(self.path)
+
+    def test_get_film(self):
+        status, headers, body = call(self.app, '/film/1', dict(self.headers, **{'X-Request-ID': 'abc'}))
+
+        self.assertEqual(200, status)
+        self.assertEqual({'id': 1, 'name': 'name', 'duration': 100, 'state': 'Done',
+                          'created_at': 'Thu, 01 Dec 2022 00:00:00 GMT'}, json.loads(body))
+        self.assertEqual('"1-3"', headers['etag'])
+        self.assertEqual('abc', headers['x-request-id'])
+        self.assertEqual('application/json', headers['content-type'])
+
+    def test_get_film_not_modified(self):
+        status, headers, body = call(self.app, '/film/1', dict(self.headers, **{'If-None-Match': '"1-3"'}))
+
+        self.assertEqual((304, b''), (status, body))
+        self.assertEqual('"1-3"', headers['etag'])
+
+    def test_get_film_not_found(self):
+        for path in ('/film/2', '/film/abc'):
+            status, headers, body = call(self.app, path, self.headers)
+
+            self.assertEqual(404, status)
+            self.assertEqual('Film with such id does not exist.', json.loads(body)['errors'][0]['message'])
+            self.assertEqual(headers['x-request-id'], json.loads(body)['traceId'])
+
+    def test_get_user(self):
+        status, headers, body = call(self.app, '/user/1', self.headers)
+
+        self.assertEqual(200, status)
+        self.assertEqual({'id': 1, 'username': 'username', 'email': 'e@mail', 'password': 'hash',
+                          'roles': ['user', 'admin']}, json.loads(body))
+        self.assertEqual('"1-1"', headers['etag'])
+
+    def test_get_user_by_username(self):
+        status, headers, body = call(self.app, '/user/name/username', self.headers)
+
+        self.assertEqual(200, status)
+        self.assertEqual(['user', 'admin'], json.loads(body)['roles'])
+        self.assertNotIn('etag', headers)
+
+    def test_get_user_by_username_not_found(self):
+        status, _, body = call(self.app, '/user/name/other', self.headers)
+
+        self.assertEqual(404, status)
+        self.assertEqual('User with such username does not exist.', json.loads(body)['errors'][0]['message'])
+
+    def test_unauthorized(self):
+        status, headers, body = call(self.app, '/film/1')
+
+        self.assertEqual((401, b'Unauthorized Access'), (status, body))
+        self.assertEqual('Basic realm="Authentication Required"', headers['www-authenticate'])
+
+    def test_forbidden(self):
+        headers = {'Authorization': 'Bearer ' + issue_token(Principal(1, 'username', ('guest',)))}
+
+        status, _, _ = call(self.app, '/film/1', headers)
+
+        self.assertEqual(403, status)
+
+    @mock.patch('src.model.user.User.verify_hash')
+    def test_basic_auth(self, mock_verify_hash):
+        mock_verify_hash.return_value = True
+        headers = {'Authorization': 'Basic ' + b64encode(b'username:password').decode()}
+
+        first, _, _ = call(self.app, '/film/1', headers)
+        second, _, _ = call(self.app, '/film/1', headers)
+
+        self.assertEqual((200, 200), (first, second))
+        mock_verify_hash.assert_called_once_with('password', 'hash')
+
+    @mock.patch('src.model.user.User.verify_hash')
+    def test_basic_auth_wrong_password(self, mock_verify_hash):
+        mock_verify_hash.return_value = False
+        headers = {'Authorization': 'Basic ' + b64encode(b'username:wrong').decode()}
+
+        status, _, _ = call(self.app, '/film/1', headers)
+
+        self.assertEqual(401, status)
+
+    @mock.patch('src.model.user.User.verify_hash')
+    def test_basic_auth_saturated(self, mock_verify_hash):
+        from src.model.hashing import HashingSaturatedError
+
+        mock_verify_hash.side_effect = HashingSaturatedError()
+        headers = {'Authorization': 'Basic ' + b64encode(b'username:password').decode()}
+
+        status, headers, body = call(self.app, '/film/1', headers)
+
+        self.assertEqual(503, status)
+        self.assertEqual('1', headers['retry-after'])
+        self.assertEqual(HashingSaturatedError.description, json.loads(body)['errors'][0]['message'])
+
+    def test_other_routes(self):
+        self.assertEqual(404, call(self.app, '/films', self.headers)[0])
+        status, headers, _ = call(self.app, '/film/1', self.headers, method='PUT')
+
+        self.assertEqual(405, status)
+        self.assertEqual('GET', headers['allow'])
+
+    def test_lifespan(self):
+        sent = []
+        messages = iter([{'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}])
+
+        async def receive():
+            return next(messages)
+
+        async def send(message):
+            sent.append(message['type'])
+
+        asyncio.run(self.app({'type': 'lifespan'}, receive, send))
+
+        self.assertEqual(['lifespan.startup.complete', 'lifespan.shutdown.complete'], sent)
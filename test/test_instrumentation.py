@@ -0,0 +1,67 @@
+from unittest import TestCase
+
+from flask import Response
+from sqlalchemy import create_engine, text
+
+from src.app import app
+from src.instrumentation import assert_max_queries
+
+
+class TestInstrumentation(TestCase):
+
+    def setUp(self) -> None:
+        self.engine = create_engine('sqlite://')
+
+    def run_queries(self, count):
+        with self.engine.connect() as connection:
+            for _ in range(count):
+                connection.execute(text('SELECT 1'))
+
+    def test_assert_max_queries(self):
+        with assert_max_queries(2) as stats:
+            self.run_queries(2)
+
+        self.assertEqual(2, stats.count)
+        self.assertEqual(['SELECT 1', 'SELECT 1'], stats.statements)
+
+    def test_assert_max_queries_fails(self):
+        with self.assertRaises(AssertionError) as context:
+            with assert_max_queries(1):
+                self.run_queries(3)
+
+        self.assertIn('3 queries issued, at most 1 expected', str(context.exception))
+
+    def test_assert_max_queries_ignores_failed_statement(self):
+        with assert_max_queries(1) as stats:
+            with self.engine.connect() as connection:
+                with self.assertRaises(Exception):
+                    connection.execute(text('SELECT * FROM missing'))
+            self.run_queries(1)
+
+        self.assertEqual(1, stats.count)
+
+    def test_server_timing(self):
+        with app.test_request_context('/films'):
+            app.preprocess_request()
+            with assert_max_queries(3) as stats:
+                self.run_queries(3)
+            response = app.process_response(Response())
+            app.do_teardown_request()
+
+        self.assertEqual(3, stats.count)
+        self.assertRegex(response.headers['Server-Timing'], r'^db;dur=[\d.]+;desc="3 queries", app;dur=[\d.]+$')
+
+    def test_server_timing_disabled(self):
+        app.config['SERVER_TIMING'] = False
+        try:
+            response = app.test_client().get('/missing')
+        finally:
+            app.config['SERVER_TIMING'] = True
+
+        self.assertNotIn('Server-Timing', response.headers)
+
+    def test_server_timing_on_not_found(self):
+        response = app.test_client().get('/missing')
+
+        self.assertEqual(404, response.status_code)
+        self.assertIn('desc="0 queries"', response.headers['Server-Timing'])
@@ -0,0 +1,67 @@
+from datetime import date
+from unittest import TestCase, skipIf
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from src.json_provider import OrjsonProvider, get_json_provider_class, orjson
+
+
+@skipIf(orjson is None, 'orjson is not installed')
+class TestOrjsonProvider(TestCase):
+
+    def setUp(self) -> None:
+        self.app = Flask(__name__)
+        self.app.json = OrjsonProvider(self.app)
+        self.stdlib = DefaultJSONProvider(self.app)
+        self.payload = {'name': 'name', 'id': 1, 'created_at': date(2022, 12, 1), 'roles': ['user'], 'next': None}
+
+    def test_response_matches_stdlib(self):
+        with self.app.app_context():
+            expected = self.stdlib.response(self.payload).get_data()
+            result = self.app.json.response(self.payload)
+
+        self.assertEqual(expected, result.get_data())
+        self.assertEqual('application/json', result.mimetype)
+
+    def test_dumps_compact_uses_orjson(self):
+        result = self.app.json.dumps({'b': 1, 'a': 2}, separators=(',', ':'))
+
+        self.assertEqual('{"a":2,"b":1}', result)
+
+    def test_dumps_keeps_key_order_unsorted(self):
+        result = self.app.json.dumps({'b': 1, 'a': 2}, sort_keys=False, separators=(',', ':'))
+
+        self.assertEqual('{"b":1,"a":2}', result)
+
+    def test_dumps_other_arguments_fall_back(self):
+        with self.app.app_context():
+            self.assertEqual(self.stdlib.dumps(self.payload, indent=2), self.app.json.dumps(self.payload, indent=2))
+            self.assertEqual(self.stdlib.dumps(self.payload), self.app.json.dumps(self.payload))
+
+    def test_debug_response_is_indented(self):
+        self.app.debug = True
+        with self.app.app_context():
+            result = self.app.json.response(self.payload)
+
+        self.assertIn(b'\n  "created_at"', result.get_data())
+
+    def test_non_ascii_as_utf8(self):
+        self.assertEqual('{"name":"Тіні"}', self.app.json.dumps({'name': 'Тіні'}, separators=(',', ':')))
+
+    def test_loads(self):
+        self.assertEqual({'a': [1, None]}, self.app.json.loads('{"a": [1, null]}'))
+
+
+class TestGetJsonProviderClass(TestCase):
+
+    def test_stdlib(self):
+        self.assertIs(DefaultJSONProvider, get_json_provider_class('stdlib'))
+
+    def test_orjson(self):
+        expected = OrjsonProvider if orjson is not None else DefaultJSONProvider
+
+        self.assertIs(expected, get_json_provider_class('orjson'))
+
+    def test_unknown(self):
+        with self.assertRaises(ValueError):
+            get_json_provider_class('ujson')
@@ -0,0 +1,66 @@
+from unittest import TestCase, mock
+
+from undecorated import undecorated
+
+from src.app import app
+from src.metrics import Counter, Histogram, render_metrics, http_requests, password_verify_duration
+from src.model import User
+from src.route import get_metrics
+
+
+class TestMetrics(TestCase):
+
+    def test_counter_render(self):
+        counter = Counter('requests_total', 'Requests.', ('path',))
+        counter.inc('/a')
+        counter.inc('/a')
+        counter.inc('say "hi"\n')
+
+        self.assertEqual(['# HELP requests_total Requests.',
+                          '# TYPE requests_total counter',
+                          'requests_total{path="/a"} 2',
+                          'requests_total{path="say \\"hi\\"\\n"} 1'], counter.render())
+
+    def test_histogram_render(self):
+        histogram = Histogram('latency_seconds', 'Latency.', ('route',), buckets=(0.1, 1))
+        for seconds in (0.05, 0.1, 0.5, 3):
+            histogram.observe(seconds, '/a')
+
+        self.assertEqual(['# HELP latency_seconds Latency.',
+                          '# TYPE latency_seconds histogram',
+                          'latency_seconds_bucket{route="/a",le="0.1"} 2',
+                          'latency_seconds_bucket{route="/a",le="1"} 3',
+                          'latency_seconds_bucket{route="/a",le="+Inf"} 4',
+                          'latency_seconds_sum{route="/a"} 3.650000',
+                          'latency_seconds_count{route="/a"} 4'], histogram.render())
+
+    def test_histogram_without_labels(self):
+        histogram = Histogram('wait_seconds', 'Wait.', buckets=(1,))
+        histogram.observe(0.5)
+
+        self.assertIn('wait_seconds_bucket{le="1"} 1', histogram.render())
+        self.assertIn('wait_seconds_count 1', histogram.render())
+
+    def test_request_is_recorded(self):
+        before = http_requests.value('unmatched', 'GET', 404)
+
+        app.test_client().get('/missing')
+
+        self.assertEqual(before + 1, http_requests.value('unmatched', 'GET', 404))
+        self.assertIn('http_request_duration_seconds_count{endpoint="unmatched",method="GET"}', render_metrics())
+
+    @mock.patch('src.model.user.hashing_executor.run')
+    def test_password_verification_is_timed(self, mock_run):
+        mock_run.return_value = True
+        before = password_verify_duration.count()
+
+        User.verify_hash('password', 'hash')
+
+        self.assertEqual(before + 1, password_verify_duration.count())
+
+    def test_get_metrics(self):
+        with app.test_request_context('/metrics'):
+            response = undecorated(get_metrics)()
+
+        self.assertEqual('text/plain; version=0.0.4; charset=utf-8', response.headers['Content-Type'])
+        self.assertIn('# TYPE http_requests_total counter', response.get_data(as_text=True))
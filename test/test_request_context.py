@@ -0,0 +1,93 @@
+import json
+from unittest import TestCase, mock
+
+from src.app import app
+from src.error_handler.exception_wrapper import handle_error_format, handle_server_exception
+from src.request_context import TracebackSampler, current_request_id, new_request_id, traceback_sampler
+
+
+class TestRequestContext(TestCase):
+
+    def test_new_request_ids_are_unique(self):
+        first, second = new_request_id(), new_request_id()
+
+        self.assertNotEqual(first, second)
+        self.assertEqual(first.split('-')[0], second.split('-')[0])
+
+    def test_header_is_generated(self):
+        response = app.test_client().get('/missing')
+
+        self.assertRegex(response.headers['X-Request-ID'], r'^[0-9a-f]{8}-[0-9a-f]+$')
+
+    def test_incoming_header_is_kept(self):
+        response = app.test_client().get('/missing', headers={'X-Request-ID': 'edge-42.a'})
+
+        self.assertEqual('edge-42.a', response.headers['X-Request-ID'])
+
+    def test_invalid_incoming_header_is_replaced(self):
+        for request_id in ('bad id', 'x' * 129):
+            response = app.test_client().get('/missing', headers={'X-Request-ID': request_id})
+
+            self.assertRegex(response.headers['X-Request-ID'], r'^[0-9a-f]{8}-[0-9a-f]+$')
+
+    def test_error_payload_uses_request_id(self):
+        with app.test_request_context('/film/1', headers={'X-Request-ID': 'abc'}):
+            app.preprocess_request()
+            result = handle_error_format('message', 'source')
+            self.assertEqual('abc', current_request_id())
+            app.do_teardown_request()
+
+        self.assertEqual('abc', result['traceId'])
+        self.assertNotEqual('abc', current_request_id())
+
+    @mock.patch('src.request_context.logger')
+    def test_server_exception(self, mock_logger):
+        mock_logger.isEnabledFor.return_value = True
+
+        @handle_server_exception
+        def failing():
+            raise KeyError('film')
+
+        with app.test_request_context('/film/1', headers={'X-Request-ID': 'abc'}):
+            app.preprocess_request()
+            result = failing()
+            app.do_teardown_request()
+
+        self.assertEqual(({'traceId': 'abc', 'errors': ["<class 'KeyError'>", "'film'"]}, 500), result)
+        message, = mock_logger.error.call_args.args
+        self.assertEqual({'request_id': 'abc', 'error': 'KeyError', 'message': "'film'"}, json.loads(message))
+
+    @mock.patch('src.request_context.logger')
+    def test_server_exception_traceback_is_sampled(self, mock_logger):
+        mock_logger.isEnabledFor.return_value = True
+
+        @handle_server_exception
+        def failing():
+            raise ValueError('boom')
+
+        with mock.patch.object(traceback_sampler, 'sample', side_effect=[(True, 0), (False, 0)]):
+            failing()
+            failing()
+
+        self.assertIsInstance(mock_logger.error.call_args_list[0].kwargs['exc_info'], ValueError)
+        self.assertIsNone(mock_logger.error.call_args_list[1].kwargs['exc_info'])
+
+
+class TestTracebackSampler(TestCase):
+
+    def setUp(self) -> None:
+        self.now = 0.0
+        self.sampler = TracebackSampler(limit=2, interval=1.0, timer=lambda: self.now)
+
+    def test_limit_per_interval(self):
+        self.assertEqual([(True, 0), (True, 0), (False, 0), (False, 0)],
+                         [self.sampler.sample() for _ in range(4)])
+
+    def test_next_interval_reports_suppressed(self):
+        for _ in range(5):
+            self.sampler.sample()
+        self.now = 1.0
+
+        self.assertEqual((True, 3), self.sampler.sample())
+        self.assertEqual((True, 0), self.sampler.sample())
+        self.assertEqual((False, 0), self.sampler.sample())